@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from threading import Lock
+from typing import Generic, TypeVar
+
+
+T = TypeVar("T")
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def token_expires_in(token: str) -> float | None:
+    # the signature is verified upstream, we only peek at the exp claim
+    try:
+        segment = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+        exp = claims.get("exp")
+        if exp is None:
+            return None
+        return float(exp) - time.time()
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def token_ttl(token: str, max_ttl: float) -> float:
+    expires_in = token_expires_in(token)
+    if expires_in is None:
+        return max_ttl
+    return min(max_ttl, expires_in)
+
+
+class TTLCache(Generic[T]):
+    # get_or_load coalescing is event-loop only; the entry map is also used
+    # from sync endpoints in the threadpool, so it has its own lock
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._lock = Lock()
+        self._inflight: dict[str, asyncio.Future[T | None]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, key: str) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def get(self, key: str) -> T | None:
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: T, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T | None]],
+        ttl_seconds: float | None = None,
+    ) -> T | None:
+        value = self._lookup(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        # concurrent lookups for the same key share one upstream call
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            self.misses += 1
+            inflight = asyncio.ensure_future(self._load(key, loader, ttl_seconds))
+            self._inflight[key] = inflight
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(inflight)
+
+    async def _load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[T | None]],
+        ttl_seconds: float | None,
+    ) -> T | None:
+        try:
+            value = await loader()
+            if value is not None:
+                self.set(key, value, ttl_seconds)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
@@ -1,25 +1,48 @@
 from datetime import datetime
+from importlib.util import find_spec
 from typing import Annotated, NoReturn
 from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status, Header, Query
 from pydantic import BaseModel
 from sqlmodel import Session
 from sqlalchemy import create_engine
+from app.api.auth_cache import TTLCache, token_key, token_ttl
 from app.core.config import settings
 import httpx
 
 
-async def fetch_username(user_id: int) -> tuple[int, str]:
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/users/{user_id}",
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=5.0,
-            )
-        response.raise_for_status()
-        return user_id, response.json()["name"]
-    except Exception:
-        return user_id, "Unknown User"
+_auth_client: httpx.AsyncClient | None = None
+
+
+def _build_auth_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.AUTH_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AUTH_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        # http2 needs the optional h2 package (httpx[http2])
+        http2=settings.AUTH_HTTP2 and find_spec("h2") is not None,
+    )
+
+
+async def open_auth_client() -> None:
+    global _auth_client
+    if _auth_client is None or _auth_client.is_closed:
+        _auth_client = _build_auth_client()
+
+
+async def close_auth_client() -> None:
+    global _auth_client
+    if _auth_client is not None:
+        await _auth_client.aclose()
+        _auth_client = None
+
+
+def get_auth_client() -> httpx.AsyncClient:
+    global _auth_client
+    if _auth_client is None or _auth_client.is_closed:
+        _auth_client = _build_auth_client()
+    return _auth_client
 
 
 class AuthUser(BaseModel):
@@ -32,6 +55,16 @@ class AuthUser(BaseModel):
     access_token: str = ""  
 
 
+user_cache: TTLCache[AuthUser] = TTLCache(
+    settings.AUTH_TOKEN_CACHE_MAX_ENTRIES,
+    settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+permission_cache: TTLCache[bool] = TTLCache(
+    settings.AUTH_PERMISSION_CACHE_MAX_ENTRIES,
+    settings.AUTH_PERMISSION_CACHE_TTL_SECONDS,
+)
+
+
 CONNECT_ARGS = {"check_same_thread": False} if settings.DB_DRIVER == "sqlite" else {}
 engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, connect_args=CONNECT_ARGS)
 
@@ -64,57 +97,136 @@ def get_token_from_authorization(authorization: str | None, websocket: WebSocket
 
 
 async def validate_token(token: str) -> dict:
-    async with httpx.AsyncClient() as client:
+    client = get_auth_client()
+    response = await client.post(
+        f"{settings.AUTH_SERVICE_URL}/validate-token",
+        json={"jwt_token": token},
+        headers={"x-api-key": settings.AUTH_API_KEY},
+        timeout=5.0
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def _permission_key(jwt_token: str, permission: str) -> str:
+    return f"{token_key(jwt_token)}:{permission}"
+
+
+def evict_token(token: str) -> None:
+    # a revoked token must not keep authenticating from the cache until its TTL
+    key = token_key(token)
+    user_cache.pop(key)
+    permission_cache.pop_prefix(f"{key}:")
+
+
+def bearer_token(authorization: str | None) -> str | None:
+    scheme, _, token = (authorization or "").partition(" ")
+    return (token.strip() or None) if scheme.lower() == "bearer" else None
+
+
+def _permission_ttl(jwt_token: str) -> float:
+    return token_ttl(jwt_token, settings.AUTH_PERMISSION_CACHE_TTL_SECONDS)
+
+
+async def _fetch_permission(jwt_token: str, permission: str) -> bool:
+    client = get_auth_client()
+    try:
         response = await client.post(
-            f"{settings.AUTH_SERVICE_URL}/validate-token",
-            json={"jwt_token": token},
+            f"{settings.AUTH_SERVICE_URL}/check-permission",
+            json={"jwt_token": jwt_token, "permission": permission},
             headers={"x-api-key": settings.AUTH_API_KEY},
-            timeout=5.0
         )
         response.raise_for_status()
-        return response.json()
-
-
-async def check_permission(jwt_token: str, permission: str) -> bool:
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/check-permission",
-                json={"jwt_token": jwt_token, "permission": permission},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["valid"]
+        data = response.json()
+        return data["valid"]
     except httpx.RequestError:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Auth service unavailable")
     except (KeyError, ValueError):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Invalid response from auth service")
 
 
-async def check_permissions(jwt_token: str, permissions: list[str]) -> dict:
+async def _fetch_permissions(jwt_token: str, permissions: list[str]) -> dict[str, bool]:
+    client = get_auth_client()
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/check-permissions",
-                json={"jwt_token": jwt_token, "permissions": permissions},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-            )
-            resp.raise_for_status()
-            return resp.json()
+        resp = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/check-permissions",
+            json={"jwt_token": jwt_token, "permissions": permissions},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+        )
+        resp.raise_for_status()
+        data = resp.json()
     except httpx.RequestError:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Auth service unavailable")
     except (ValueError, httpx.HTTPStatusError):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Invalid response from auth service")
 
+    results = data.get("permissions", data) if isinstance(data, dict) else None
+    if not isinstance(results, dict):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Invalid response from auth service")
+    return {permission: bool(results.get(permission, False)) for permission in permissions}
+
+
+async def check_permission(jwt_token: str, permission: str) -> bool:
+    allowed = await permission_cache.get_or_load(
+        _permission_key(jwt_token, permission),
+        lambda: _fetch_permission(jwt_token, permission),
+        _permission_ttl(jwt_token),
+    )
+    return bool(allowed)
+
+
+async def check_permissions(jwt_token: str, permissions: list[str]) -> dict[str, bool]:
+    results: dict[str, bool] = {}
+    missing: list[str] = []
+    for permission in dict.fromkeys(permissions):
+        cached = permission_cache.get(_permission_key(jwt_token, permission))
+        if cached is None:
+            missing.append(permission)
+        else:
+            results[permission] = cached
+
+    if len(missing) == 1:
+        results[missing[0]] = await check_permission(jwt_token, missing[0])
+    elif missing:
+        fetched = await _fetch_permissions(jwt_token, missing)
+        ttl = _permission_ttl(jwt_token)
+        for permission, allowed in fetched.items():
+            permission_cache.set(_permission_key(jwt_token, permission), allowed, ttl)
+        results.update(fetched)
+
+    return results
+
+
+class PermissionResolver:
+    """Resolve every permission a route declared in one batched call on first use."""
+
+    def __init__(self, user: AuthUser, permissions: tuple[str, ...]) -> None:
+        self.user = user
+        self.permissions = permissions
+        self._resolved: dict[str, bool] = {}
+
+    async def has(self, permission: str) -> bool:
+        if permission not in self._resolved:
+            wanted = [p for p in dict.fromkeys((*self.permissions, permission)) if p not in self._resolved]
+            self._resolved.update(await check_permissions(self.user.access_token, wanted))
+        return self._resolved[permission]
+
+
+async def _load_user(token: str) -> AuthUser | None:
+    data = await validate_token(token)
+    if not data.get("valid"):
+        return None
+    data["user"]["access_token"] = token
+    return AuthUser.model_validate(data["user"])
+
 
 async def get_user(token: str, websocket: WebSocket | None = None) -> AuthUser:
     try:
-        data = await validate_token(token)
-        if not data.get("valid"):
-            raise_auth_exception(status.HTTP_401_UNAUTHORIZED, "Invalid or expired token", websocket)
-        data["user"]["access_token"] = token
-        return AuthUser.model_validate(data["user"])
+        user = await user_cache.get_or_load(
+            token_key(token),
+            lambda: _load_user(token),
+            token_ttl(token, settings.AUTH_TOKEN_CACHE_TTL_SECONDS),
+        )
     except httpx.HTTPStatusError:
         raise_auth_exception(status.HTTP_401_UNAUTHORIZED, "Invalid or expired token", websocket)
     except httpx.RequestError:
@@ -122,6 +234,10 @@ async def get_user(token: str, websocket: WebSocket | None = None) -> AuthUser:
     except KeyError:
         raise_auth_exception(status.HTTP_500_INTERNAL_SERVER_ERROR, "Invalid response from auth service", websocket)
 
+    if user is None:
+        raise_auth_exception(status.HTTP_401_UNAUTHORIZED, "Invalid or expired token", websocket)
+    return user
+
 
 async def get_current_user(authorization: Annotated[str | None, Header()] = None) -> AuthUser:
     token = get_token_from_authorization(authorization, None)
@@ -135,6 +251,12 @@ async def get_current_user_ws(websocket: WebSocket, access_token: Annotated[str
 
 
 
+def resolve_permissions(*permissions: str):
+    def resolver(user: AuthUser = Depends(get_current_user)) -> PermissionResolver:
+        return PermissionResolver(user, permissions)
+    return resolver
+
+
 def require_permission(permission: str):
     async def checker(user: AuthUser = Depends(get_current_user)):
         allowed = await check_permission(user.access_token, permission)
@@ -171,6 +293,11 @@ def PermissionWs(permission: str) -> AuthUser:
 def Permission(permission: str) -> AuthUser:
     return Depends(require_permission(permission))
 
+
+def Permissions(*permissions: str) -> PermissionResolver:
+    return Depends(resolve_permissions(*permissions))
+
 DbSession = Annotated[Session, Depends(get_session)]
 CurrentUser = Annotated[AuthUser, Depends(get_current_user)]
-CurrentUserWs = Annotated[AuthUser, Depends(get_current_user_ws)]
\ No newline at end of file
+CurrentUserWs = Annotated[AuthUser, Depends(get_current_user_ws)]
+AuthClient = Annotated[httpx.AsyncClient, Depends(get_auth_client)]
\ No newline at end of file
@@ -0,0 +1,97 @@
+from collections.abc import Sequence
+
+from app.models.experiment_log import ExperimentRunDownsampled, ExperimentRunSeries, OutputColumns
+
+
+TIME_KEY = "time"
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> list[int]:
+    """Largest-Triangle-Three-Buckets, returns the indices of the kept points."""
+    count = len(xs)
+    if threshold >= count:
+        return list(range(count))
+    if threshold < 3:
+        return [0, count - 1][:threshold]
+
+    every = (count - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        avg_start = int((bucket + 1) * every) + 1
+        avg_end = min(int((bucket + 2) * every) + 1, count)
+        avg_size = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_size
+        avg_y = sum(ys[avg_start:avg_end]) / avg_size
+
+        anchor_x = xs[anchor]
+        anchor_y = ys[anchor]
+        best = start = int(bucket * every) + 1
+        best_area = -1.0
+        for index in range(start, int((bucket + 1) * every) + 1):
+            area = abs((anchor_x - avg_x) * (ys[index] - anchor_y) - (anchor_x - xs[index]) * (avg_y - anchor_y))
+            if area > best_area:
+                best_area = area
+                best = index
+
+        selected.append(best)
+        anchor = best
+
+    selected.append(count - 1)
+    return selected
+
+
+def _numeric_values(columns: OutputColumns, name: str) -> Sequence[float | None] | None:
+    # typed arrays are dense; json columns (gaps, nulls, mixed values) keep
+    # their numeric points and turn everything else into None
+    column = columns.columns.get(name)
+    if column is None:
+        return None
+    if not isinstance(column, list):
+        return column
+
+    missing = columns.missing.get(name, ())
+    values = [
+        None if index in missing or isinstance(value, bool) or not isinstance(value, (int, float)) else value
+        for index, value in enumerate(column)
+    ]
+    return values if any(value is not None for value in values) else None
+
+
+def _points(xs: Sequence[float | None], ys: Sequence[float | None]) -> tuple[Sequence[float], Sequence[float]]:
+    if not isinstance(xs, list) and not isinstance(ys, list):
+        return xs, ys  # type: ignore[return-value]
+    pairs = [(x, y) for x, y in zip(xs, ys) if x is not None and y is not None]
+    return [x for x, _ in pairs], [y for _, y in pairs]
+
+
+def downsample_run(columns: OutputColumns, width: int, channels: list[str] | None) -> ExperimentRunDownsampled:
+    xs = _numeric_values(columns, TIME_KEY)
+    x_key = TIME_KEY if xs is not None else None
+    if xs is None:
+        xs = range(columns.length)
+
+    series: dict[str, ExperimentRunSeries] = {}
+    skipped: list[str] = []
+    for name in channels or columns.names:
+        if name == x_key:
+            continue
+        ys = _numeric_values(columns, name)
+        if ys is None:
+            skipped.append(name)
+            continue
+
+        px, py = _points(xs, ys)
+        indices = lttb(px, py, width)
+        series[name] = ExperimentRunSeries(
+            x=[float(px[index]) for index in indices],
+            y=[float(py[index]) for index in indices],
+        )
+
+    return ExperimentRunDownsampled(
+        sample_count=columns.length,
+        width=width,
+        x_key=x_key,
+        series=series,
+        skipped=skipped,
+    )
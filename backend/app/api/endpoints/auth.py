@@ -1,10 +1,10 @@
 from typing import Annotated
-from fastapi import APIRouter, Cookie, HTTPException, Response, status
+from fastapi import APIRouter, Cookie, Header, HTTPException, Response, status
 from fastapi.responses import JSONResponse
 from datetime import datetime, timezone
 import httpx
 
-from app.api.dependencies import CurrentUser
+from app.api.dependencies import AuthClient, CurrentUser, bearer_token, evict_token
 from app.core.config import settings
 from app.models.auth import (
     ChangeNameRequest, 
@@ -54,19 +54,18 @@ def calc_max_age(expires_at: str | datetime) -> int:
 
 
 @router.post("/register", response_model=TokenResponse)
-async def register(credentials: RegisterRequest, response: Response):
+async def register(credentials: RegisterRequest, response: Response, client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            auth_response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/register",
-                json={
-                    "name": credentials.name,
-                    "username": credentials.username,
-                    "password": credentials.password
-                },
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        auth_response = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/register",
+            json={
+                "name": credentials.name,
+                "username": credentials.username,
+                "password": credentials.password
+            },
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         auth_response.raise_for_status()
         token_data = auth_response.json()
         
@@ -89,15 +88,14 @@ async def register(credentials: RegisterRequest, response: Response):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: LoginRequest, response: Response):
+async def login(credentials: LoginRequest, response: Response, client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            auth_response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/login",
-                json={"username": credentials.username, "password": credentials.password, "remember_me": credentials.remember_me},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        auth_response = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/login",
+            json={"username": credentials.username, "password": credentials.password, "remember_me": credentials.remember_me},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         auth_response.raise_for_status()
         token_data = auth_response.json()
         
@@ -120,20 +118,19 @@ async def login(credentials: LoginRequest, response: Response):
 
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh(refresh_token: str | None = Cookie(default=None)):
+async def refresh(client: AuthClient, refresh_token: str | None = Cookie(default=None)):
     if not refresh_token:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Refresh token not found"
         )
     try:
-        async with httpx.AsyncClient() as client: 
-            response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/refresh",  
-                json={"refresh_token": refresh_token},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/refresh",  
+            json={"refresh_token": refresh_token},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -149,16 +146,15 @@ async def refresh(refresh_token: str | None = Cookie(default=None)):
 
 
 @router.post("/session")
-async def get_session(refresh_token: str | None = Cookie(default=None)):
+async def get_session(client: AuthClient, refresh_token: str | None = Cookie(default=None)):
     if not refresh_token:
         raise HTTPException(status_code=401, detail="No refresh token")
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{settings.AUTH_SERVICE_URL}/refresh",
-            headers={"X-Api-Key": settings.AUTH_API_KEY},
-            json={"refresh_token": refresh_token}
-        )
+    response = await client.post(
+        f"{settings.AUTH_SERVICE_URL}/refresh",
+        headers={"X-Api-Key": settings.AUTH_API_KEY},
+        json={"refresh_token": refresh_token}
+    )
     
     if response.status_code != 200:
         raise HTTPException(status_code=401, detail="Invalid session")
@@ -167,20 +163,26 @@ async def get_session(refresh_token: str | None = Cookie(default=None)):
 
 
 @router.post("/logout")
-async def logout(refresh_token: str | None = Cookie(default=None)):
+async def logout(
+    client: AuthClient,
+    refresh_token: str | None = Cookie(default=None),
+    authorization: Annotated[str | None, Header()] = None,
+):
+    access_token = bearer_token(authorization)
+    if access_token:
+        evict_token(access_token)
     if not refresh_token:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Refresh token not found"
         )
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.AUTH_SERVICE_URL}/logout",  
-                json={"refresh_token": refresh_token},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.post(
+            f"{settings.AUTH_SERVICE_URL}/logout",  
+            json={"refresh_token": refresh_token},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -196,13 +198,12 @@ async def logout(refresh_token: str | None = Cookie(default=None)):
 
 
 @router.post("/validate-token")
-async def validate_token(jwt_token: Annotated[str, Cookie(alias="refresh_token")]):
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{settings.AUTH_SERVICE_URL}/validate-token",
-            headers={"X-Api-Key": settings.AUTH_API_KEY},
-            json={"jwt_token": jwt_token}
-        )
+async def validate_token(client: AuthClient, jwt_token: Annotated[str, Cookie(alias="refresh_token")]):
+    response = await client.post(
+        f"{settings.AUTH_SERVICE_URL}/validate-token",
+        headers={"X-Api-Key": settings.AUTH_API_KEY},
+        json={"jwt_token": jwt_token}
+    )
     
     if response.status_code != 200:
         raise HTTPException(status_code=401, detail="Invalid session")
@@ -211,28 +212,26 @@ async def validate_token(jwt_token: Annotated[str, Cookie(alias="refresh_token")
 
 
 @router.post("/check-permission")
-async def check_permission(perm_request: PermissionRequest) -> bool:
+async def check_permission(perm_request: PermissionRequest, client: AuthClient) -> bool:
     if not perm_request.jwt_token:
         raise HTTPException(status_code=401, detail="No jwt token")
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{settings.AUTH_SERVICE_URL}/check-permission",
-            headers={"X-Api-Key": settings.AUTH_API_KEY},
-            json={"jwt_token": perm_request.jwt_token, "permission": perm_request.permission}
-        )
+    response = await client.post(
+        f"{settings.AUTH_SERVICE_URL}/check-permission",
+        headers={"X-Api-Key": settings.AUTH_API_KEY},
+        json={"jwt_token": perm_request.jwt_token, "permission": perm_request.permission}
+    )
     
     data = response.json()
     return data["valid"]
 
 
 @router.get("/permissions", response_model=PermissionResponse)
-async def get_permissions(user: CurrentUser):
+async def get_permissions(user: CurrentUser, client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/users/{user.id}/permissions",
-                headers={"X-Api-Key": settings.AUTH_API_KEY},
-            )
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/users/{user.id}/permissions",
+            headers={"X-Api-Key": settings.AUTH_API_KEY},
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -248,14 +247,13 @@ async def get_permissions(user: CurrentUser):
 
 
 @router.get("/providers", response_model=list[ProviderResponse])
-async def get_oath_providers():
+async def get_oath_providers(client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/providers",
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/providers",
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -271,14 +269,13 @@ async def get_oath_providers():
 
 
 @router.get("/user/{id}")
-async def get_user_by_id(id: int):
+async def get_user_by_id(id: int, client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.AUTH_SERVICE_URL}/users/{id}",
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.get(
+            f"{settings.AUTH_SERVICE_URL}/users/{id}",
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -294,15 +291,14 @@ async def get_user_by_id(id: int):
 
 
 @router.patch("/update-user")
-async def update_username(credentials: ChangeNameRequest):
+async def update_username(credentials: ChangeNameRequest, client: AuthClient):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{settings.AUTH_SERVICE_URL}/update-user",
-                json={"jwt_token": credentials.jwt_token, "name": credentials.name},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.patch(
+            f"{settings.AUTH_SERVICE_URL}/update-user",
+            json={"jwt_token": credentials.jwt_token, "name": credentials.name},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
@@ -318,16 +314,22 @@ async def update_username(credentials: ChangeNameRequest):
 
 
 @router.patch("/change-password")
-async def change_password(credentials: ChangePasswordRequest):
+async def change_password(
+    credentials: ChangePasswordRequest,
+    client: AuthClient,
+    authorization: Annotated[str | None, Header()] = None,
+):
+    for token in (credentials.jwt_token, bearer_token(authorization)):
+        if token:
+            evict_token(token)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{settings.AUTH_SERVICE_URL}/change-password",
-                json={"jwt_token": credentials.jwt_token, "password_old": credentials.password_old, 
-                    "password_new": credentials.password_new, "password_new_repeat": credentials.password_new_repeat},
-                headers={"x-api-key": settings.AUTH_API_KEY},
-                timeout=10.0
-            )
+        response = await client.patch(
+            f"{settings.AUTH_SERVICE_URL}/change-password",
+            json={"jwt_token": credentials.jwt_token, "password_old": credentials.password_old, 
+                "password_new": credentials.password_new, "password_new_repeat": credentials.password_new_repeat},
+            headers={"x-api-key": settings.AUTH_API_KEY},
+            timeout=10.0
+        )
         response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
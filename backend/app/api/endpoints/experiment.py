@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, status
 from sqlmodel import col, select
 from app.api.dependencies import AuthUser, CurrentUser, DbSession, Permission
 from app.api.endpoints.server import resolve_url
+from app.api.queue_events import notify_experiment_queued, publish_experiment_queued
 
 from app.models.device import Device, DevicePublic
 from app.models.experiment import Experiment, ExperimentCreate, ExperimentPublic, ExperimentFormQueue, ExperimentQueuePayload, ExperimentUpdate
@@ -105,7 +106,10 @@ def queue(db: DbSession, experiment: ExperimentFormQueue,  user: CurrentUser):
             modified_at=now(),
         )
         db.add(queue_entry)
+        db.flush()
+        notify_experiment_queued(db, ensure(queue_entry.id))
         db.commit()
+        publish_experiment_queued(queue_entry.id)
         db.refresh(queue_entry)
         return {
             "queue_id": queue_entry.id,
@@ -172,7 +176,10 @@ def queue(db: DbSession, experiment: ExperimentFormQueue,  user: CurrentUser):
         modified_at=now(),
     )
     db.add(queue_entry)
+    db.flush()
+    notify_experiment_queued(db, ensure(queue_entry.id))
     db.commit()
+    publish_experiment_queued(queue_entry.id)
     db.refresh(queue_entry)
 
     return {
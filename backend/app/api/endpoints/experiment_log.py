@@ -1,23 +1,61 @@
-import asyncio
-from fastapi import APIRouter, HTTPException, status
-from sqlalchemy.orm import selectinload
-from sqlmodel import col, select
-from app.api.dependencies import AuthUser, CurrentUser, DbSession, Permission, fetch_username
+import base64
+import json
+from datetime import datetime
+from collections.abc import Iterator
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Text, cast, func, tuple_
+from sqlalchemy.orm import defer, selectinload
+from sqlmodel import Session, col, select
+from app.api.auth_cache import TTLCache
+from app.api.dependencies import AuthUser, CurrentUser, DbSession, Permission, engine
+from app.api.downsample import downsample_run
+from app.api.run_export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    arrow_available,
+    iter_arrow,
+    iter_csv,
+    iter_ndjson,
+    legacy_output_samples,
+    merge_channel_kinds,
+)
+from app.api.usernames import resolve_usernames
+from app.core.config import settings
 
 from app.models.experiment import Experiment
-from app.models.experiment_log import ExperimentLog, ExperimentLogLatestDevice, ExperimentLogPublic, ExperimentLogPublicEnriched
+from app.models.experiment_log import (
+    ExperimentLog,
+    ExperimentLogFilter,
+    ExperimentLogLatestDevice,
+    ExperimentLogOutput,
+    ExperimentLogPublic,
+    ExperimentLogPublicEnriched,
+    ExperimentLogSummary,
+    ExperimentRunDownsampled,
+    ExperimentRunSummary,
+    OutputColumns,
+    decode_output_columns,
+    output_channel_kinds,
+)
 from app.models.utils import now
 
 
 router = APIRouter()
 
+downsample_cache: TTLCache[ExperimentRunDownsampled] = TTLCache(
+    settings.EXPERIMENT_LOG_DOWNSAMPLE_CACHE_MAX_ENTRIES,
+    settings.EXPERIMENT_LOG_DOWNSAMPLE_CACHE_TTL_SECONDS,
+)
+
 
 def _enrich(log: ExperimentLog, username: str | None = None) -> ExperimentLogPublicEnriched:
     software_name: str | None = None
     if log.experiment and log.experiment.software:
         software_name = log.experiment.software.name
     return ExperimentLogPublicEnriched(
-        **ExperimentLogPublic.model_validate(log).model_dump(),
+        **ExperimentLogPublic.model_validate(log, update={"run": log.load_run()}).model_dump(),
         server_name=log.server.name if log.server else None,
         device_name=log.device.name if log.device else None,
         software_name=software_name,
@@ -25,23 +63,214 @@ def _enrich(log: ExperimentLog, username: str | None = None) -> ExperimentLogPub
     )
 
 
+def _summarize(row, username: str | None = None) -> ExperimentLogSummary:
+    log, sample_count, duration, output_keys, has_run = row
+    software_name: str | None = None
+    if log.experiment and log.experiment.software:
+        software_name = log.experiment.software.name
+    run_summary = None
+    if has_run:
+        run_summary = ExperimentRunSummary(
+            sample_count=sample_count or 0,
+            duration=duration,
+            output_keys=output_keys or [],
+        )
+    return ExperimentLogSummary.model_validate(log, update={
+        "server_name": log.server.name if log.server else None,
+        "device_name": log.device.name if log.device else None,
+        "software_name": software_name,
+        "username": username,
+        "run_summary": run_summary,
+    })
+
+
+def _run_summary_columns():
+    return (
+        col(ExperimentLogOutput.sample_count).label("sample_count"),
+        (col(ExperimentLogOutput.time_end) - col(ExperimentLogOutput.time_start)).label("duration"),
+        col(ExperimentLogOutput.channels).label("output_keys"),
+        (func.jsonb_typeof(col(ExperimentLog.run)) == "object").label("has_run"),
+    )
+
+
 def _logs_query():
-    return select(ExperimentLog).options(
+    # list endpoints never ship run, only metadata computed next to the data
+    return select(ExperimentLog, *_run_summary_columns()).outerjoin(
+        ExperimentLogOutput,
+        col(ExperimentLogOutput.experiment_log_id) == col(ExperimentLog.id),
+    ).options(
+        defer(ExperimentLog.run),  # type: ignore[arg-type]
         selectinload(ExperimentLog.experiment).selectinload(Experiment.software),  # type: ignore[arg-type]
         selectinload(ExperimentLog.server),  # type: ignore[arg-type]
         selectinload(ExperimentLog.device),  # type: ignore[arg-type]
     )
 
 
-@router.get("/", response_model=list[ExperimentLogPublicEnriched])
-async def get_all(db: DbSession, _: AuthUser = Permission("olm.experiment_log.read_all")):
-    logs = db.exec(_logs_query()).all()
-    unique_user_ids = list({log.user_id for log in logs})
-    user_map: dict[int, str] = {}
-    if unique_user_ids:
-        results = await asyncio.gather(*[fetch_username(uid) for uid in unique_user_ids])
-        user_map = dict(results)
-    return [_enrich(log, username=user_map.get(log.user_id)) for log in logs]
+def _encode_cursor(log: ExperimentLog) -> str:
+    started_at = log.started_at.isoformat() if log.started_at is not None else None
+    raw = json.dumps([started_at, log.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        started_at, log_id = json.loads(raw)
+        return (datetime.fromisoformat(started_at) if started_at is not None else None, int(log_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _apply_filters(stmt, filters: ExperimentLogFilter):
+    if filters.user_id is not None:
+        stmt = stmt.where(col(ExperimentLog.user_id) == filters.user_id)
+    if filters.device_id is not None:
+        stmt = stmt.where(col(ExperimentLog.device_id) == filters.device_id)
+    if filters.server_id is not None:
+        stmt = stmt.where(col(ExperimentLog.server_id) == filters.server_id)
+    if filters.experiment_id is not None:
+        stmt = stmt.where(col(ExperimentLog.experiment_id) == filters.experiment_id)
+    if filters.finish_reason is not None:
+        stmt = stmt.where(col(ExperimentLog.finish_reason) == filters.finish_reason)
+    if filters.started_from is not None:
+        stmt = stmt.where(col(ExperimentLog.started_at) >= filters.started_from)
+    if filters.started_to is not None:
+        stmt = stmt.where(col(ExperimentLog.started_at) < filters.started_to)
+    return stmt
+
+
+def _fetch_page(db: Session, stmt, cursor: str | None, limit: int) -> list:
+    # newest first, never-started logs last; (started_at, id) keeps the order total.
+    # Started and never-started logs are read as separate branches so each one
+    # walks the (…, started_at DESC NULLS LAST, id DESC) indexes without a sort.
+    started_at_col = col(ExperimentLog.started_at)
+    id_col = col(ExperimentLog.id)
+    started_at, log_id = _decode_cursor(cursor) if cursor is not None else (None, None)
+
+    rows = []
+    if cursor is None or started_at is not None:
+        started = stmt.where(started_at_col.is_not(None))
+        if started_at is not None:
+            started = started.where(tuple_(started_at_col, id_col) < tuple_(started_at, log_id))
+        started = started.order_by(started_at_col.desc().nulls_last(), id_col.desc()).limit(limit + 1)
+        rows = list(db.exec(started).all())
+        if len(rows) > limit:
+            return rows
+
+    never_started = stmt.where(started_at_col.is_(None))
+    if cursor is not None and started_at is None:
+        never_started = never_started.where(id_col < log_id)
+    never_started = never_started.order_by(id_col.desc()).limit(limit + 1 - len(rows))
+    return rows + list(db.exec(never_started).all())
+
+
+@router.get("/", response_model=list[ExperimentLogSummary])
+async def get_all(
+    db: DbSession,
+    response: Response,
+    filters: Annotated[ExperimentLogFilter, Depends()],
+    limit: int = Query(
+        default=settings.EXPERIMENT_LOG_PAGE_DEFAULT_SIZE,
+        ge=1,
+        le=settings.EXPERIMENT_LOG_PAGE_MAX_SIZE,
+    ),
+    cursor: str | None = Query(default=None),
+    _: AuthUser = Permission("olm.experiment_log.read_all"),
+):
+    rows = _fetch_page(db, _apply_filters(_logs_query(), filters), cursor, limit)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1][0])
+    user_map = await resolve_usernames(row[0].user_id for row in rows)
+    return [_summarize(row, username=user_map.get(row[0].user_id)) for row in rows]
+
+
+EXPORT_PAGE_SIZE = 100
+
+
+def _export_log_ids(session: Session, filters: ExperimentLogFilter) -> Iterator[int]:
+    last_id = 0
+    while True:
+        stmt = _apply_filters(select(ExperimentLog.id).where(col(ExperimentLog.id) > last_id), filters)
+        ids = list(session.exec(stmt.order_by(col(ExperimentLog.id)).limit(EXPORT_PAGE_SIZE)).all())
+        if not ids:
+            return
+        yield from ids
+        last_id = ids[-1]
+
+
+def _export_output(session: Session, log_id: int) -> bytes | None:
+    return session.exec(
+        select(ExperimentLogOutput.data).where(ExperimentLogOutput.experiment_log_id == log_id)
+    ).first()
+
+
+def _export_legacy_samples(session: Session, log_id: int) -> list[dict]:
+    # logs without a columnar output keep their run verbatim in the JSONB column
+    run = session.exec(select(ExperimentLog.run).where(ExperimentLog.id == log_id)).first()
+    return legacy_output_samples(run)
+
+
+def _export_channel_kinds(session: Session, log_ids: Iterator[int]) -> dict[str, str | None]:
+    # metadata only, the run blobs are fetched and decoded once, while streaming
+    kinds: dict[str, str | None] = {}
+    for log_id in log_ids:
+        stored = session.exec(
+            select(ExperimentLogOutput.channels, ExperimentLogOutput.channel_kinds)
+            .where(ExperimentLogOutput.experiment_log_id == log_id)
+        ).first()
+        if stored is not None:
+            # jsonb does not keep key order, channels does
+            channels, channel_kinds = stored
+            merge_channel_kinds(kinds, {name: channel_kinds.get(name) for name in channels})
+        else:
+            merge_channel_kinds(kinds, output_channel_kinds(_export_legacy_samples(session, log_id)))
+    return kinds
+
+
+def _export_runs(session: Session, log_ids: Iterator[int]) -> Iterator[tuple[int, OutputColumns]]:
+    # one run is decoded at a time, memory stays flat across a bulk export
+    for log_id in log_ids:
+        data = _export_output(session, log_id)
+        if data is not None:
+            yield log_id, decode_output_columns(data)
+            continue
+        samples = _export_legacy_samples(session, log_id)
+        if samples:
+            yield log_id, OutputColumns.from_samples(samples)
+
+
+def _stream_export(export_format: ExportFormat, log_ids, with_log_id: bool):
+    # the request session is gone once streaming starts, the generator owns its own
+    with Session(engine) as session:
+        if export_format == ExportFormat.NDJSON:
+            yield from iter_ndjson(_export_runs(session, log_ids(session)), with_log_id)
+            return
+        channel_kinds = _export_channel_kinds(session, log_ids(session))
+        runs = _export_runs(session, log_ids(session))
+        if export_format == ExportFormat.CSV:
+            yield from iter_csv(runs, list(channel_kinds), with_log_id)
+        else:
+            yield from iter_arrow(runs, channel_kinds, with_log_id)
+
+
+def _export_response(export_format: ExportFormat, filename: str, log_ids, with_log_id: bool) -> StreamingResponse:
+    if export_format == ExportFormat.ARROW and not arrow_available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Arrow export requires pyarrow")
+    return StreamingResponse(
+        _stream_export(export_format, log_ids, with_log_id),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
+
+
+@router.get("/export")
+def export_all(
+    filters: Annotated[ExperimentLogFilter, Depends()],
+    format: ExportFormat = Query(default=ExportFormat.NDJSON),
+    _: AuthUser = Permission("olm.experiment_log.read_all"),
+):
+    return _export_response(format, "experiment_logs", lambda session: _export_log_ids(session, filters), True)
 
 
 @router.get("/{experiment_id}/latest", response_model=ExperimentLogLatestDevice)
@@ -58,13 +287,13 @@ def get_latest_device_by_experiment(db: DbSession, experiment_id: int, user: Cur
     return ExperimentLogLatestDevice(device_id=log.device_id if log else None)
 
 
-@router.get("/me", response_model=list[ExperimentLogPublicEnriched])
+@router.get("/me", response_model=list[ExperimentLogSummary])
 async def get_all_by_user(db: DbSession, user: CurrentUser):
-    logs = db.exec(_logs_query().where(col(ExperimentLog.user_id) == user.id)).all()
+    rows = db.exec(_logs_query().where(col(ExperimentLog.user_id) == user.id)).all()
     username: str | None = None
-    if logs:
-        _, username = await fetch_username(user.id)
-    return [_enrich(log, username=username) for log in logs]
+    if rows:
+        username = (await resolve_usernames([user.id]))[user.id]
+    return [_summarize(row, username=username) for row in rows]
 
 
 @router.get("/{id}", response_model=ExperimentLogPublicEnriched)
@@ -77,6 +306,84 @@ def get_by_id(db: DbSession, id: int, user: CurrentUser):
     return _enrich(db_exp_log)
 
 
+def _iter_text(text: str, chunk_size: int = 64 * 1024):
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+
+def _iter_run(run: dict, columns: OutputColumns, batch_size: int = 1000):
+    # samples are rebuilt from the column arrays a batch at a time
+    head = json.dumps({key: value for key, value in run.items() if key != "output_history"})
+    yield head[:-1] + (", " if len(head) > 2 else "") + '"output_history": ['
+    for start in range(0, columns.length, batch_size):
+        stop = min(start + batch_size, columns.length)
+        batch = ", ".join(json.dumps(columns.sample(index)) for index in range(start, stop))
+        yield (", " if start else "") + batch
+    yield "]}"
+
+
+@router.get("/{id}/run")
+def get_run(db: DbSession, id: int, user: CurrentUser):
+    row = db.exec(
+        select(ExperimentLog.user_id, cast(col(ExperimentLog.run), Text), ExperimentLogOutput.data)
+        .outerjoin(ExperimentLogOutput, col(ExperimentLogOutput.experiment_log_id) == col(ExperimentLog.id))
+        .where(ExperimentLog.id == id)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Experiment Log with {id} not found!")
+    owner_id, run_json, output_data = row
+    if owner_id != user.id and not user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    run = json.loads(run_json) if run_json is not None else None
+    if output_data is None or not isinstance(run, dict):
+        # legacy shapes are passed through as stored, no pydantic round-trip
+        return StreamingResponse(_iter_text(run_json or "null"), media_type="application/json")
+    return StreamingResponse(_iter_run(run, decode_output_columns(output_data)), media_type="application/json")
+
+
+@router.get("/{id}/downsampled", response_model=ExperimentRunDownsampled)
+def get_downsampled(
+    db: DbSession,
+    id: int,
+    user: CurrentUser,
+    width: int = Query(ge=3, le=settings.EXPERIMENT_LOG_DOWNSAMPLE_MAX_WIDTH),
+    channels: list[str] | None = Query(default=None),
+):
+    row = db.exec(
+        select(ExperimentLog.user_id, ExperimentLogOutput.sample_count)
+        .outerjoin(ExperimentLogOutput, col(ExperimentLogOutput.experiment_log_id) == col(ExperimentLog.id))
+        .where(ExperimentLog.id == id)
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Experiment Log with {id} not found!")
+    owner_id, sample_count = row
+    if owner_id != user.id and not user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    if sample_count is None:
+        return ExperimentRunDownsampled(sample_count=0, width=width, x_key=None, series={})
+
+    # sample_count is part of the key so a run that is still growing is never served stale
+    key = f"{id}:{sample_count}:{width}:{','.join(sorted(channels or []))}"
+    cached = downsample_cache.get(key)
+    if cached is not None:
+        return cached
+
+    data = db.exec(select(ExperimentLogOutput.data).where(ExperimentLogOutput.experiment_log_id == id)).one()
+    result = downsample_run(decode_output_columns(data), width, channels)
+    downsample_cache.set(key, result)
+    return result
+
+
+@router.get("/{id}/export")
+def export(db: DbSession, id: int, user: CurrentUser, format: ExportFormat = Query(default=ExportFormat.NDJSON)):
+    owner_id = db.exec(select(ExperimentLog.user_id).where(ExperimentLog.id == id)).first()
+    if owner_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Experiment Log with {id} not found!")
+    if owner_id != user.id and not user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return _export_response(format, f"experiment_log_{id}", lambda session: iter([id]), False)
+
+
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete(db: DbSession, id: int, user: CurrentUser):
     db_exp_log = db.get(ExperimentLog, id)
@@ -1,7 +1,8 @@
-import asyncio
 from fastapi import APIRouter, HTTPException, Query, status
 from sqlmodel import col, select, asc
-from app.api.dependencies import AuthUser, CurrentUser, DbSession, Permission, check_permission, fetch_username
+from app.api.dependencies import CurrentUser, DbSession, PermissionResolver, Permissions
+from app.api.reservation_events import notify_reservation_changed, publish_reservation_changed
+from app.api.usernames import UNKNOWN_USER, resolve_usernames
 from app.core.config import settings
 
 from app.models.device import Device
@@ -20,15 +21,10 @@ async def get_all(db: DbSession, _: CurrentUser, device_id: int | None = Query(d
         stmt = stmt.where(Reservation.device_id == device_id)
     reservations = db.exec(stmt).all()
 
-    unique_user_ids = list({r.user_id for r in reservations})
-
-    user_map: dict[int, str] = {}
-    if unique_user_ids:
-        results = await asyncio.gather(*[fetch_username(uid) for uid in unique_user_ids])
-        user_map = dict(results)
+    user_map = await resolve_usernames(r.user_id for r in reservations)
 
     return [
-        ReservationWithUsername(**r.model_dump(), username=user_map.get(r.user_id, "Unknown User"))
+        ReservationWithUsername(**r.model_dump(), username=user_map.get(r.user_id, UNKNOWN_USER))
         for r in reservations
     ]
 
@@ -126,14 +122,19 @@ def create(db: DbSession, reservation: ReservationCreate, user: CurrentUser):
 
 
 @router.patch("/{id}", response_model=ReservationPublic)
-async def update(db: DbSession, id: int, reservation: ReservationUpdate, user: CurrentUser):
+async def update(
+    db: DbSession,
+    id: int,
+    reservation: ReservationUpdate,
+    user: CurrentUser,
+    permissions: PermissionResolver = Permissions("olm.reservation.update_all"),
+):
     db_reservation = db.get(Reservation, id)
     if not db_reservation:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Reservation with {id} not found!")
 
     if db_reservation.user_id != user.id:
-        can_update_all = await check_permission(user.access_token, "olm.reservation.update_all")
-        if not can_update_all:
+        if not await permissions.has("olm.reservation.update_all"):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
     new_start = reservation.start if reservation.start is not None else db_reservation.start
@@ -186,22 +187,30 @@ async def update(db: DbSession, id: int, reservation: ReservationUpdate, user: C
             )
         
     db.add(db_reservation)
+    notify_reservation_changed(db, id)
     db.commit()
     db.refresh(db_reservation)
+    publish_reservation_changed(id)
     return db_reservation
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete(db: DbSession, id: int, user: CurrentUser):
+async def delete(
+    db: DbSession,
+    id: int,
+    user: CurrentUser,
+    permissions: PermissionResolver = Permissions("olm.reservation.delete_all"),
+):
     db_reservation = db.get(Reservation, id)
     if not db_reservation:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Reservation with {id} not found!")
 
     if db_reservation.user_id != user.id:
-        can_delete_all = await check_permission(user.access_token, "olm.reservation.delete_all")
-        if not can_delete_all:
+        if not await permissions.has("olm.reservation.delete_all"):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
     db.delete(db_reservation)
+    notify_reservation_changed(db, id)
     db.commit()
+    publish_reservation_changed(id)
     return db_reservation
\ No newline at end of file
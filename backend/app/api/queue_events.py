@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import threading
+from contextlib import suppress
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.api.reservation_events import register_channel
+from app.core.config import settings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+QUEUE_CHANNEL = "olm_experiment_queued"
+
+_wakeups_lock = threading.Lock()
+_wakeups: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+
+def subscribe_queue_wakeup() -> asyncio.Event:
+    # the event is set on the subscriber's loop, whichever thread publishes
+    wakeup = asyncio.Event()
+    with _wakeups_lock:
+        _wakeups.add((asyncio.get_running_loop(), wakeup))
+    return wakeup
+
+
+def unsubscribe_queue_wakeup(wakeup: asyncio.Event) -> None:
+    with _wakeups_lock:
+        for subscription in [s for s in _wakeups if s[1] is wakeup]:
+            _wakeups.discard(subscription)
+
+
+def publish_experiment_queued(queue_id: int | None = None) -> None:
+    with _wakeups_lock:
+        subscriptions = list(_wakeups)
+    for loop, wakeup in subscriptions:
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(wakeup.set)
+
+
+def notify_experiment_queued(db: Session, queue_id: int) -> None:
+    # NOTIFY is transactional: call before commit so other processes only wake for committed entries
+    if settings.EXPERIMENT_QUEUE_PG_NOTIFY:
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": QUEUE_CHANNEL, "payload": str(queue_id)})
+
+
+register_channel(QUEUE_CHANNEL, publish_experiment_queued)
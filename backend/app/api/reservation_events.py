@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import select as _select
+import threading
+from collections.abc import Callable
+from contextlib import suppress
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.api.dependencies import engine
+from app.core.config import settings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+RESERVATION_CHANNEL = "olm_reservation_changed"
+
+_Listener = tuple[asyncio.AbstractEventLoop, Callable[[int], None]]
+
+_listeners_lock = threading.Lock()
+_listeners: dict[int, set[_Listener]] = {}
+
+
+def subscribe_reservation(reservation_id: int, callback: Callable[[int], None]) -> Callable[[], None]:
+    # callbacks always run on the subscriber's loop, whichever thread publishes
+    listener = (asyncio.get_running_loop(), callback)
+    with _listeners_lock:
+        _listeners.setdefault(reservation_id, set()).add(listener)
+
+    def unsubscribe() -> None:
+        with _listeners_lock:
+            listeners = _listeners.get(reservation_id)
+            if listeners is None:
+                return
+            listeners.discard(listener)
+            if not listeners:
+                _listeners.pop(reservation_id, None)
+
+    return unsubscribe
+
+
+def publish_reservation_changed(reservation_id: int) -> None:
+    with _listeners_lock:
+        listeners = list(_listeners.get(reservation_id, ()))
+    for loop, callback in listeners:
+        with suppress(RuntimeError):
+            loop.call_soon_threadsafe(callback, reservation_id)
+
+
+def notify_reservation_changed(db: Session, reservation_id: int) -> None:
+    # NOTIFY is transactional: call before commit so other processes only hear committed edits
+    if settings.RESERVATION_EVENTS_PG_NOTIFY:
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": RESERVATION_CHANNEL, "payload": str(reservation_id)})
+
+
+# NOTIFY channels handled by the listener; handlers run on the app event loop
+_channel_handlers: dict[str, Callable[[int], None]] = {RESERVATION_CHANNEL: publish_reservation_changed}
+
+
+def register_channel(channel: str, handler: Callable[[int], None]) -> None:
+    _channel_handlers[channel] = handler
+
+
+def _listen(stop: threading.Event, loop: asyncio.AbstractEventLoop) -> None:
+    while not stop.is_set():
+        try:
+            raw_connection = engine.raw_connection()
+            try:
+                connection = raw_connection.driver_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    for channel in _channel_handlers:
+                        cursor.execute(f"LISTEN {channel}")
+                logger.info("WORKER: listening for notifications channels=%s", ",".join(_channel_handlers))
+
+                while not stop.is_set():
+                    if _select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        handler = _channel_handlers.get(notify.channel)
+                        if handler is None:
+                            continue
+                        with suppress(ValueError):
+                            loop.call_soon_threadsafe(handler, int(notify.payload))
+            finally:
+                # a LISTENing connection must not go back to the pool
+                raw_connection.invalidate()
+        except Exception:
+            logger.exception("WORKER: notification listener failed, retrying")
+            stop.wait(5)
+
+
+async def run_reservation_listener(stop_event: asyncio.Event) -> None:
+    stop = threading.Event()
+    listener = asyncio.create_task(asyncio.to_thread(_listen, stop, asyncio.get_running_loop()))
+    await stop_event.wait()
+    stop.set()
+    await listener
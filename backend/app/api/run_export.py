@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from collections.abc import Iterable, Iterator
+from enum import Enum
+from importlib.util import find_spec
+from typing import Any
+
+from app.models.experiment_log import OutputColumns
+
+
+EXPORT_BATCH_SIZE = 1000
+LOG_ID_COLUMN = "experiment_log_id"
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    ARROW = "arrow"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+def arrow_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+# channel kinds are the ones from app.models.experiment_log.output_channel_kinds
+def merge_channel_kinds(into: dict[str, str | None], kinds: dict[str, str | None]) -> None:
+    for name, kind in kinds.items():
+        current = into.get(name)
+        if current is None:
+            into[name] = kind
+        elif kind is None or kind == current:
+            continue
+        elif "json" in (current, kind):
+            into[name] = "json"
+        else:
+            into[name] = "f8"
+
+
+def legacy_output_samples(run: Any) -> list[dict[str, Any]]:
+    # runs kept verbatim in experiment_log.run: one run object or a list of them
+    samples: list[dict[str, Any]] = []
+    for item in run if isinstance(run, list) else [run]:
+        history = item.get("output_history") if isinstance(item, dict) else None
+        if isinstance(history, list):
+            samples.extend(sample for sample in history if isinstance(sample, dict))
+    return samples
+
+
+def _batches(columns: OutputColumns) -> Iterator[range]:
+    for start in range(0, columns.length, EXPORT_BATCH_SIZE):
+        yield range(start, min(start + EXPORT_BATCH_SIZE, columns.length))
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _channel_values(columns: OutputColumns, name: str, batch: range) -> list[Any]:
+    if name not in columns.columns:
+        return [None] * len(batch)
+    missing = columns.missing.get(name, ())
+    return [None if index in missing else columns.value(name, index) for index in batch]
+
+
+def iter_ndjson(runs: Iterable[tuple[int, OutputColumns]], with_log_id: bool) -> Iterator[str]:
+    for log_id, columns in runs:
+        for batch in _batches(columns):
+            lines = []
+            for index in batch:
+                sample = columns.sample(index)
+                if with_log_id:
+                    sample = {LOG_ID_COLUMN: log_id, **sample}
+                lines.append(json.dumps(sample))
+            yield "\n".join(lines) + "\n"
+
+
+def iter_csv(runs: Iterable[tuple[int, OutputColumns]], channels: list[str], with_log_id: bool) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([LOG_ID_COLUMN, *channels] if with_log_id else channels)
+    yield buffer.getvalue()
+
+    for log_id, columns in runs:
+        for batch in _batches(columns):
+            buffer.seek(0)
+            buffer.truncate()
+            values = [_channel_values(columns, name, batch) for name in channels]
+            for row in zip(*values):
+                row = [_csv_value(value) for value in row]
+                writer.writerow([log_id, *row] if with_log_id else row)
+            yield buffer.getvalue()
+
+
+def _arrow_value(value: Any, kind: str | None) -> Any:
+    if value is None:
+        return None
+    if kind == "json":
+        return value if isinstance(value, str) else json.dumps(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return int(value) if kind == "i8" else float(value)
+
+
+def iter_arrow(
+    runs: Iterable[tuple[int, OutputColumns]],
+    channel_kinds: dict[str, str | None],
+    with_log_id: bool,
+) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    # the schema comes from the kinds merged over every exported run: ints
+    # stay int64, any float makes a channel float64, anything else is text
+    types = {"i8": pa.int64(), "json": pa.string()}
+    fields = [pa.field(LOG_ID_COLUMN, pa.int64())] if with_log_id else []
+    fields += [pa.field(name, types.get(kind, pa.float64())) for name, kind in channel_kinds.items()]
+    schema = pa.schema(fields)
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield _drain(sink)
+        for log_id, columns in runs:
+            for batch in _batches(columns):
+                arrays = [pa.array([log_id] * len(batch), pa.int64())] if with_log_id else []
+                for name, kind in channel_kinds.items():
+                    values = [_arrow_value(value, kind) for value in _channel_values(columns, name, batch)]
+                    arrays.append(pa.array(values, schema.field(name).type))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+                yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+
+import httpx
+
+from app.api.auth_cache import TTLCache
+from app.api.dependencies import get_auth_client
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_USER = "Unknown User"
+
+
+def _parse_batch_response(data: object) -> dict[int, str]:
+    if isinstance(data, dict):
+        data = data.get("users", data)
+
+    if isinstance(data, dict):
+        return {int(user_id): str(name) for user_id, name in data.items()}
+
+    if isinstance(data, list):
+        return {int(user["id"]): str(user["name"]) for user in data if isinstance(user, dict)}
+
+    raise ValueError("unexpected users batch response")
+
+
+class UsernameDirectory:
+    def __init__(self) -> None:
+        self.cache: TTLCache[str] = TTLCache(
+            settings.AUTH_USERNAME_CACHE_MAX_ENTRIES,
+            settings.AUTH_USERNAME_CACHE_TTL_SECONDS,
+        )
+        self.batch_supported = True
+        self._semaphore = asyncio.Semaphore(max(1, settings.AUTH_USERNAME_MAX_CONCURRENCY))
+
+    async def _fetch_one(self, client: httpx.AsyncClient, user_id: int) -> tuple[int, str | None]:
+        async with self._semaphore:
+            try:
+                response = await client.get(
+                    f"{settings.AUTH_SERVICE_URL}/users/{user_id}",
+                    headers={"x-api-key": settings.AUTH_API_KEY},
+                    timeout=5.0,
+                )
+                response.raise_for_status()
+                return user_id, response.json()["name"]
+            except Exception:
+                return user_id, None
+
+    async def _fetch_batch(self, client: httpx.AsyncClient, user_ids: list[int]) -> dict[int, str] | None:
+        async with self._semaphore:
+            try:
+                response = await client.post(
+                    f"{settings.AUTH_SERVICE_URL}{settings.AUTH_USERS_BATCH_PATH}",
+                    json={"ids": user_ids},
+                    headers={"x-api-key": settings.AUTH_API_KEY},
+                    timeout=10.0,
+                )
+            except httpx.RequestError:
+                return {}
+
+            if response.status_code in (404, 405, 501):
+                return None
+
+            try:
+                response.raise_for_status()
+                return _parse_batch_response(response.json())
+            except (httpx.HTTPStatusError, ValueError, KeyError, TypeError):
+                logger.warning("Username batch lookup failed status=%s", response.status_code)
+                return {}
+
+    async def _fetch(self, user_ids: list[int]) -> dict[int, str]:
+        client = get_auth_client()
+        found: dict[int, str] = {}
+
+        if self.batch_supported:
+            chunk_size = max(1, settings.AUTH_USERS_BATCH_SIZE)
+            chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+            results = await asyncio.gather(*[self._fetch_batch(client, chunk) for chunk in chunks])
+            if all(result is not None for result in results):
+                for result in results:
+                    found.update(result or {})
+                return found
+
+            logger.info("Auth service has no users batch route, falling back to per-id lookups")
+            self.batch_supported = False
+
+        results = await asyncio.gather(*[self._fetch_one(client, user_id) for user_id in user_ids])
+        return {user_id: name for user_id, name in results if name is not None}
+
+    async def resolve(self, user_ids: Iterable[int]) -> dict[int, str]:
+        names: dict[int, str] = {}
+        missing: list[int] = []
+        for user_id in dict.fromkeys(user_ids):
+            cached = self.cache.get(str(user_id))
+            if cached is None:
+                missing.append(user_id)
+            else:
+                names[user_id] = cached
+
+        if missing:
+            fetched = await self._fetch(missing)
+            for user_id, name in fetched.items():
+                self.cache.set(str(user_id), name)
+            names.update(fetched)
+
+        for user_id in missing:
+            names.setdefault(user_id, UNKNOWN_USER)
+        return names
+
+
+username_directory = UsernameDirectory()
+
+
+async def resolve_usernames(user_ids: Iterable[int]) -> dict[int, str]:
+    return await username_directory.resolve(user_ids)
@@ -1,7 +1,16 @@
+import asyncio
+import logging
+import os
+import socket
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
+from sqlalchemy import or_, update
 from sqlmodel import Session, col, select
 
+from app.api.dependencies import engine
 from app.core.config import settings
 from app.models.device import Device
 from app.models.experiment_log import FinishReason
@@ -9,6 +18,11 @@ from app.models.experiment_queue import ExperimentQueue, QueueStatus
 from app.models.reservation import Reservation
 from app.models.utils import now
 
+logger = logging.getLogger("uvicorn.error")
+
+# identifies this process in experiment_queue.claimed_by
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
 
 def queue_now() -> datetime:
     return now().replace(tzinfo=None)
@@ -70,6 +84,25 @@ def mark_retry_or_fail(entry: ExperimentQueue) -> None:
     entry.modified_at = queue_now()
 
 
+def first_poll_at(simulation_time: float) -> datetime:
+    # nothing to fetch before the run can have finished
+    lead = max(0.0, simulation_time) + settings.EXPERIMENT_QUEUE_POLL_FIRST_GRACE_SECONDS
+    return queue_now() + timedelta(seconds=lead)
+
+
+def poll_deadline(simulation_time: float) -> datetime:
+    # a job still unresolved this long after it should have finished is hung
+    lead = max(0.0, simulation_time) + settings.EXPERIMENT_QUEUE_POLL_GIVE_UP_GRACE_SECONDS
+    return queue_now() + timedelta(seconds=lead)
+
+
+def calculate_next_poll(poll_attempts: int) -> datetime:
+    base = max(0.1, settings.EXPERIMENT_QUEUE_POLL_BASE_SECONDS)
+    cap = max(base, settings.EXPERIMENT_QUEUE_POLL_MAX_SECONDS)
+    delay = min(base * settings.EXPERIMENT_QUEUE_POLL_BACKOFF_FACTOR ** max(0, poll_attempts - 1), cap)
+    return queue_now() + timedelta(seconds=delay)
+
+
 def _intervals_overlap(
     start_a: datetime, end_a: datetime, start_b: datetime, end_b: datetime
 ) -> bool:
@@ -109,3 +142,94 @@ def find_overlapping_reservation(
         .order_by(col(Reservation.start))
     )
     return session.exec(stmt).first()
+
+
+def claim_entries(*conditions) -> list[int]:
+    # rows are locked with SKIP LOCKED and leased in the same transaction, so
+    # concurrent replicas never pick the same entry; a lease left behind by a
+    # dead worker simply expires and the row becomes claimable again
+    current_time = queue_now()
+    lease_until = current_time + timedelta(seconds=settings.EXPERIMENT_QUEUE_LEASE_SECONDS)
+    with Session(engine) as session:
+        stmt = (
+            select(ExperimentQueue)
+            .where(
+                *conditions,
+                or_(
+                    col(ExperimentQueue.lease_until).is_(None),
+                    col(ExperimentQueue.lease_until) <= current_time,
+                ),
+            )
+            .order_by(col(ExperimentQueue.created_at))
+            .limit(settings.EXPERIMENT_QUEUE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        entries = session.exec(stmt).all()
+        for entry in entries:
+            if entry.claimed_by is not None and entry.claimed_by != WORKER_ID:
+                logger.info("WORKER: recovered expired lease queue_id=%s owner=%s", entry.id, entry.claimed_by)
+            entry.claimed_by = WORKER_ID
+            entry.lease_until = lease_until
+        session.commit()
+        return [entry.id for entry in entries if entry.id is not None]
+
+
+def owned_by_worker():
+    # write-backs only touch rows this worker still holds the lease on
+    return col(ExperimentQueue.claimed_by) == WORKER_ID
+
+
+def get_owned_entry(session: Session, entry_id: int) -> ExperimentQueue | None:
+    return session.exec(
+        select(ExperimentQueue).where(ExperimentQueue.id == entry_id, owned_by_worker())
+    ).first()
+
+
+def renew_entries(entry_ids: list[int]) -> int:
+    lease_until = queue_now() + timedelta(seconds=settings.EXPERIMENT_QUEUE_LEASE_SECONDS)
+    with Session(engine) as session:
+        result = session.exec(  # type: ignore[call-overload]
+            update(ExperimentQueue)
+            .where(col(ExperimentQueue.id).in_(entry_ids), owned_by_worker())
+            .values(lease_until=lease_until)
+        )
+        session.commit()
+        return result.rowcount
+
+
+async def _renew_until_cancelled(entry_ids: list[int]) -> None:
+    interval = max(1.0, settings.EXPERIMENT_QUEUE_LEASE_SECONDS / 3)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            renewed = await asyncio.to_thread(renew_entries, entry_ids)
+        except Exception:
+            logger.exception("WORKER: lease renewal failed")
+            continue
+        if renewed < len(entry_ids):
+            logger.warning("WORKER: lost lease on %s of %s queue entries", len(entry_ids) - renewed, len(entry_ids))
+
+
+@asynccontextmanager
+async def leased(entry_ids: list[int]) -> AsyncIterator[None]:
+    # keeps the claim alive however long the tick takes, then releases it
+    renewer = asyncio.create_task(_renew_until_cancelled(entry_ids))
+    try:
+        yield
+    finally:
+        renewer.cancel()
+        with suppress(asyncio.CancelledError):
+            await renewer
+        await asyncio.to_thread(release_entries, entry_ids)
+
+
+def release_entries(entry_ids: list[int]) -> None:
+    if not entry_ids:
+        return
+    with Session(engine) as session:
+        session.exec(  # type: ignore[call-overload]
+            update(ExperimentQueue)
+            .where(col(ExperimentQueue.id).in_(entry_ids), owned_by_worker())
+            .values(claimed_by=None, lease_until=None)
+        )
+        session.commit()
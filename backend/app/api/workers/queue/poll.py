@@ -1,9 +1,11 @@
 import asyncio
 import logging
 from dataclasses import dataclass
+from datetime import datetime
 
 import httpx
-from sqlmodel import Session, col, select
+from sqlalchemy import or_
+from sqlmodel import Session, col
 
 from app.api.dependencies import engine
 from app.api.endpoints.server import resolve_url
@@ -12,12 +14,18 @@ from app.models.experiment_log import ExperimentLog, FinishReason
 from app.models.experiment_queue import ExperimentQueue, QueueStatus
 from app.models.server import Server
 from app.models.utils import ensure, now
-from .helpers import normalize_finish_reason, parse_datetime, queue_now
+from .helpers import (
+    calculate_next_poll,
+    claim_entries,
+    get_owned_entry,
+    leased,
+    normalize_finish_reason,
+    parse_datetime,
+    queue_now,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
-_poll_counts: dict[int, int] = {}
-
 
 @dataclass
 class _PollContext:
@@ -25,52 +33,75 @@ class _PollContext:
     job_id: str
     url: str
     experiment_log_id: int
+    poll_attempts: int
+    poll_deadline_at: datetime | None
+
+    def give_up_reason(self) -> str | None:
+        # the attempt cap stays as a backstop for rows accepted without a deadline
+        if self.poll_deadline_at is not None and queue_now() >= self.poll_deadline_at:
+            return "poll_deadline"
+        if self.poll_attempts >= settings.EXPERIMENT_QUEUE_MAX_POLL_ATTEMPTS:
+            return "max_poll_attempts"
+        return None
 
 
 def _fetch_pending_ids() -> list[int]:
-    with Session(engine) as session:
-        stmt = (
-            select(ExperimentQueue)
-            .where(ExperimentQueue.status == QueueStatus.PENDING)
-            .order_by(col(ExperimentQueue.created_at))
-            .limit(settings.EXPERIMENT_QUEUE_BATCH_SIZE)
-        )
-        return [e.id for e in session.exec(stmt).all() if e.id is not None]
+    return claim_entries(
+        ExperimentQueue.status == QueueStatus.PENDING,
+        or_(
+            col(ExperimentQueue.next_poll_at).is_(None),
+            col(ExperimentQueue.next_poll_at) <= queue_now(),
+        ),
+    )
 
 
 def _prepare_poll(entry_id: int) -> _PollContext | None:
     with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
+        entry = get_owned_entry(session, entry_id)
         if entry is None or not entry.job_id:
             return None
 
         server = session.get(Server, entry.server_id)
-        if server is None or not (server.available and server.enabled and server.production):
+        base_url = resolve_url(server) if server is not None else None
+        if server is None or not (server.available and server.enabled and server.production) or not base_url:
+            # not counted as an attempt, just tried again later
+            entry.next_poll_at = calculate_next_poll(entry.poll_attempts + 1)
+            session.commit()
             logger.info("QUEUE: poll deferred queue_id=%s reason=server_unavailable", entry_id)
             return None
 
-        base_url = resolve_url(server)
-        if not base_url:
-            return None
-
         status_path = settings.EXPERIMENT_QUEUE_STATUS_PATH.format(job_id=entry.job_id)
         return _PollContext(
             entry_id=entry_id,
             job_id=entry.job_id,
             url=f"{base_url}{status_path}",
             experiment_log_id=ensure(entry.experiment_log_id),
+            poll_attempts=entry.poll_attempts,
+            poll_deadline_at=entry.poll_deadline_at,
         )
 
 
-def _mark_poll_failed(entry_id: int) -> None:
+def _mark_poll_failed(entry_id: int, reason: str) -> None:
     with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
+        entry = get_owned_entry(session, entry_id)
         if entry:
             entry.status = QueueStatus.FAILED
             entry.next_attempt_at = None
+            entry.next_poll_at = None
             entry.modified_at = queue_now()
             session.commit()
-    logger.info("QUEUE: poll failed queue_id=%s reason=max_poll_attempts", entry_id)
+    logger.info("QUEUE: poll failed queue_id=%s reason=%s", entry_id, reason)
+
+
+def _record_poll_attempt(entry_id: int) -> None:
+    # the job is not done yet (or the server did not answer), back off before the next poll
+    with Session(engine) as session:
+        entry = get_owned_entry(session, entry_id)
+        if entry is None:
+            return
+        entry.poll_attempts += 1
+        entry.next_poll_at = calculate_next_poll(entry.poll_attempts)
+        session.commit()
 
 
 def _finalize_resolved(entry_id: int, job_id: str, payload: dict) -> None:
@@ -80,7 +111,7 @@ def _finalize_resolved(entry_id: int, job_id: str, payload: dict) -> None:
     remote_finish_reason = normalize_finish_reason(payload.get("finish_reason"))
 
     with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
+        entry = get_owned_entry(session, entry_id)
         if entry is None:
             return
 
@@ -92,7 +123,7 @@ def _finalize_resolved(entry_id: int, job_id: str, payload: dict) -> None:
             if remote_finished_at is not None:
                 exp_log.finished_at = remote_finished_at
             exp_log.finish_reason = remote_finish_reason
-            exp_log.run = remote_runs
+            exp_log.store_run(remote_runs)
             exp_log.modified_at = now()
 
         entry.status = (
@@ -101,6 +132,7 @@ def _finalize_resolved(entry_id: int, job_id: str, payload: dict) -> None:
             else QueueStatus.FINISHED
         )
         entry.next_attempt_at = None
+        entry.next_poll_at = None
         entry.modified_at = queue_now()
         final_status = entry.status
         session.commit()
@@ -112,23 +144,22 @@ def _finalize_resolved(entry_id: int, job_id: str, payload: dict) -> None:
 
 
 async def poll_entry(client: httpx.AsyncClient, entry_id: int) -> None:
-    count = _poll_counts.get(entry_id, 0)
-
-    if count >= settings.EXPERIMENT_QUEUE_MAX_POLL_ATTEMPTS:
-        await asyncio.to_thread(_mark_poll_failed, entry_id)
-        _poll_counts.pop(entry_id, None)
-        return
-
     ctx = await asyncio.to_thread(_prepare_poll, entry_id)
     if ctx is None:
         return
 
-    logger.info("QUEUE: poll try queue_id=%s job_id=%s attempt=%s", entry_id, ctx.job_id, count + 1)
+    give_up_reason = ctx.give_up_reason()
+    if give_up_reason is not None:
+        await asyncio.to_thread(_mark_poll_failed, entry_id, give_up_reason)
+        return
+
+    attempt = ctx.poll_attempts + 1
+    logger.info("QUEUE: poll try queue_id=%s job_id=%s attempt=%s", entry_id, ctx.job_id, attempt)
     try:
         response = await client.get(ctx.url, headers={"x-api-key": settings.EXPERIMENTAL_API_KEY})
     except httpx.RequestError:
         logger.info("QUEUE: poll request failed queue_id=%s job_id=%s", entry_id, ctx.job_id)
-        _poll_counts[entry_id] = count + 1
+        await asyncio.to_thread(_record_poll_attempt, entry_id)
         return
 
     logger.info(
@@ -137,13 +168,13 @@ async def poll_entry(client: httpx.AsyncClient, entry_id: int) -> None:
     )
 
     if response.status_code != 200:
-        _poll_counts[entry_id] = count + 1
+        await asyncio.to_thread(_record_poll_attempt, entry_id)
         return
 
     try:
         payload = response.json()
     except ValueError:
-        _poll_counts[entry_id] = count + 1
+        await asyncio.to_thread(_record_poll_attempt, entry_id)
         return
 
     remote_runs = payload.get("run") or payload.get("runs")
@@ -151,16 +182,16 @@ async def poll_entry(client: httpx.AsyncClient, entry_id: int) -> None:
     remote_finish_reason = normalize_finish_reason(payload.get("finish_reason"))
 
     if remote_runs is None and remote_finished_at is None and remote_finish_reason == FinishReason.REASON_NONE:
-        logger.info("QUEUE: poll pending queue_id=%s job_id=%s attempt=%s", entry_id, ctx.job_id, count + 1)
-        _poll_counts[entry_id] = count + 1
+        logger.info("QUEUE: poll pending queue_id=%s job_id=%s attempt=%s", entry_id, ctx.job_id, attempt)
+        await asyncio.to_thread(_record_poll_attempt, entry_id)
         return
 
     await asyncio.to_thread(_finalize_resolved, entry_id, ctx.job_id, payload)
-    _poll_counts.pop(entry_id, None)
 
 
 async def run_poll_tick(client: httpx.AsyncClient) -> None:
     entry_ids = await asyncio.to_thread(_fetch_pending_ids)
     if not entry_ids:
         return
-    await asyncio.gather(*[poll_entry(client, entry_id) for entry_id in entry_ids])
+    async with leased(entry_ids):
+        await asyncio.gather(*[poll_entry(client, entry_id) for entry_id in entry_ids])
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import timedelta
 
 import httpx
@@ -17,7 +17,18 @@ from app.models.experiment_log import ExperimentLog
 from app.models.experiment_queue import ExperimentQueue, QueueStatus
 from app.models.server import Server
 from app.models.utils import ensure, now
-from .helpers import find_overlapping_reservation, maintenance_overlap_end, mark_retry_or_fail, queue_now, to_naive_utc
+from .helpers import (
+    claim_entries,
+    find_overlapping_reservation,
+    first_poll_at,
+    maintenance_overlap_end,
+    mark_retry_or_fail,
+    queue_now,
+    leased,
+    owned_by_worker,
+    poll_deadline,
+    to_naive_utc,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -25,29 +36,61 @@ logger = logging.getLogger("uvicorn.error")
 @dataclass
 class _SubmitContext:
     entry_id: int
+    server_id: int
     url: str
     payload_json: dict
     any_device_mode: bool = False
     locked_device_id: int | None = None
     locked_server_id: int | None = None
+    # set once the device server has answered, None means retry/defer
+    job_id: str | None = None
 
 
 def _fetch_submit_ids() -> list[int]:
+    return claim_entries(
+        ExperimentQueue.status == QueueStatus.NOT_STARTED,
+        or_(
+            col(ExperimentQueue.next_attempt_at).is_(None),
+            col(ExperimentQueue.next_attempt_at) <= queue_now(),
+        ),
+    )
+
+
+def next_submit_delay() -> float | None:
+    # seconds until the earliest waiting entry is due and unleased, None when
+    # nothing waits. Two indexed ORDER BY ... LIMIT 1 reads: the first unleased
+    # entry by next_attempt_at (NULL means due now), and the first live lease,
+    # when a dead worker's entries become claimable again
     current_time = queue_now()
+    waiting = ExperimentQueue.status == QueueStatus.NOT_STARTED
     with Session(engine) as session:
-        stmt = (
-            select(ExperimentQueue)
+        unleased = session.exec(
+            select(ExperimentQueue.id, ExperimentQueue.next_attempt_at)
             .where(
-                ExperimentQueue.status == QueueStatus.NOT_STARTED,
+                waiting,
                 or_(
-                    col(ExperimentQueue.next_attempt_at).is_(None),
-                    col(ExperimentQueue.next_attempt_at) <= current_time,
+                    col(ExperimentQueue.lease_until).is_(None),
+                    col(ExperimentQueue.lease_until) <= current_time,
                 ),
             )
-            .order_by(col(ExperimentQueue.created_at))
-            .limit(settings.EXPERIMENT_QUEUE_BATCH_SIZE)
-        )
-        return [e.id for e in session.exec(stmt).all() if e.id is not None]
+            .order_by(col(ExperimentQueue.next_attempt_at).asc().nulls_first())
+            .limit(1)
+        ).first()
+        lease_until = session.exec(
+            select(ExperimentQueue.lease_until)
+            .where(waiting, col(ExperimentQueue.lease_until) > current_time)
+            .order_by(col(ExperimentQueue.lease_until))
+            .limit(1)
+        ).first()
+
+    due = []
+    if unleased is not None:
+        due.append(unleased[1] or current_time)
+    if lease_until is not None:
+        due.append(lease_until)
+    if not due:
+        return None
+    return max(0.0, (min(due) - current_time).total_seconds())
 
 
 def _prepare_explicit(session: Session, entry: ExperimentQueue) -> _SubmitContext | None:
@@ -57,13 +100,11 @@ def _prepare_explicit(session: Session, entry: ExperimentQueue) -> _SubmitContex
     if server is None or not (server.available and server.enabled and server.production):
         logger.info("WORKER: submit skipped queue_id=%s reason=server_unavailable", entry_id)
         mark_retry_or_fail(entry)
-        session.commit()
         return None
 
     base_url = resolve_url(server)
     if not base_url:
         mark_retry_or_fail(entry)
-        session.commit()
         return None
 
     try:
@@ -72,14 +113,12 @@ def _prepare_explicit(session: Session, entry: ExperimentQueue) -> _SubmitContex
     except ValidationError:
         logger.exception("WORKER: payload validation failed queue_id=%s", entry_id)
         mark_retry_or_fail(entry)
-        session.commit()
         return None
 
     device = session.get(Device, entry.device_id)
     if device is None:
         logger.info("WORKER: submit skipped queue_id=%s reason=device_missing", entry_id)
         mark_retry_or_fail(entry)
-        session.commit()
         return None
 
     run_start = now()
@@ -95,7 +134,6 @@ def _prepare_explicit(session: Session, entry: ExperimentQueue) -> _SubmitContex
         entry.status = QueueStatus.NOT_STARTED
         entry.next_attempt_at = to_naive_utc(mo_end)
         entry.modified_at = queue_now()
-        session.commit()
         logger.info("WORKER: submit deferred queue_id=%s reason=maintenance_overlap", entry_id)
         return None
 
@@ -104,12 +142,12 @@ def _prepare_explicit(session: Session, entry: ExperimentQueue) -> _SubmitContex
         entry.status = QueueStatus.NOT_STARTED
         entry.next_attempt_at = to_naive_utc(overlap.end)
         entry.modified_at = queue_now()
-        session.commit()
         logger.info("WORKER: submit deferred queue_id=%s reason=reservation_overlap", entry_id)
         return None
 
     return _SubmitContext(
         entry_id=ensure(entry_id),
+        server_id=ensure(entry.server_id),
         url=f"{base_url}{settings.EXPERIMENT_QUEUE_SUBMIT_PATH}",
         payload_json=payload.model_dump(mode="json"),
     )
@@ -125,7 +163,6 @@ def _prepare_any_device(session: Session, entry: ExperimentQueue) -> _SubmitCont
         logger.exception("WORKER: payload validation failed queue_id=%s", entry_id)
         entry.status = QueueStatus.FAILED
         entry.modified_at = queue_now()
-        session.commit()
         return None
 
     candidates = payload.candidate_device_ids or []
@@ -133,7 +170,6 @@ def _prepare_any_device(session: Session, entry: ExperimentQueue) -> _SubmitCont
         logger.info("WORKER: submit failed queue_id=%s reason=no_candidates", entry_id)
         entry.status = QueueStatus.FAILED
         entry.modified_at = queue_now()
-        session.commit()
         return None
 
     run_start = now()
@@ -166,6 +202,7 @@ def _prepare_any_device(session: Session, entry: ExperimentQueue) -> _SubmitCont
         )
         return _SubmitContext(
             entry_id=ensure(entry_id),
+            server_id=device.server_id,
             url=f"{base_url}{settings.EXPERIMENT_QUEUE_SUBMIT_PATH}",
             payload_json=submit_payload.model_dump(mode="json"),
             any_device_mode=True,
@@ -176,91 +213,107 @@ def _prepare_any_device(session: Session, entry: ExperimentQueue) -> _SubmitCont
     entry.status = QueueStatus.NOT_STARTED
     entry.next_attempt_at = queue_now() + timedelta(seconds=settings.EXPERIMENT_QUEUE_RETRY_BASE_SECONDS)
     entry.modified_at = queue_now()
-    session.commit()
     logger.info("WORKER: submit deferred queue_id=%s reason=no_device_available", entry_id)
     return None
 
 
-def _prepare(entry_id: int) -> _SubmitContext | None:
+def _prepare_batch(entry_ids: list[int]) -> list[_SubmitContext]:
+    # one session for the whole tick; servers and devices shared by several
+    # entries are loaded once, skips and deferrals land in a single commit
+    contexts: list[_SubmitContext] = []
     with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
-        if entry is None:
-            return None
-        if entry.device_id is None:
-            return _prepare_any_device(session, entry)
-        return _prepare_explicit(session, entry)
+        entries = session.exec(
+            select(ExperimentQueue)
+            .where(col(ExperimentQueue.id).in_(entry_ids), owned_by_worker())
+            .order_by(col(ExperimentQueue.created_at))
+        ).all()
+        for entry in entries:
+            if entry.device_id is None:
+                ctx = _prepare_any_device(session, entry)
+            else:
+                ctx = _prepare_explicit(session, entry)
+            if ctx is not None:
+                contexts.append(ctx)
+        session.commit()
+    return contexts
 
 
-def _on_retry(entry_id: int) -> None:
-    with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
-        if entry is None:
-            return
-        mark_retry_or_fail(entry)
-        session.commit()
-        logger.info(
-            "WORKER: retry queue_id=%s attempts=%s status=%s",
-            entry_id, entry.attempts, entry.status,
-        )
+def _on_retry(entry: ExperimentQueue) -> None:
+    mark_retry_or_fail(entry)
+    logger.info(
+        "WORKER: retry queue_id=%s attempts=%s status=%s",
+        entry.id, entry.attempts, entry.status,
+    )
 
 
-def _on_defer(entry_id: int) -> None:
-    with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
-        if entry:
-            entry.status = QueueStatus.NOT_STARTED
-            entry.next_attempt_at = queue_now() + timedelta(seconds=settings.EXPERIMENT_QUEUE_RETRY_BASE_SECONDS)
-            entry.modified_at = queue_now()
-            session.commit()
-    logger.info("WORKER: deferred queue_id=%s reason=any_device_http_failure", entry_id)
-
-
-def _on_accepted(
-    entry_id: int,
-    job_id: str,
-    locked_device_id: int | None,
-    locked_server_id: int | None,
-) -> None:
-    with Session(engine) as session:
-        entry = session.get(ExperimentQueue, entry_id)
-        if entry is None:
-            return
-        entry.job_id = job_id
-        entry.status = QueueStatus.PENDING
-        entry.next_attempt_at = None
-        entry.modified_at = queue_now()
+def _on_defer(entry: ExperimentQueue) -> None:
+    entry.status = QueueStatus.NOT_STARTED
+    entry.next_attempt_at = queue_now() + timedelta(seconds=settings.EXPERIMENT_QUEUE_RETRY_BASE_SECONDS)
+    entry.modified_at = queue_now()
+    logger.info("WORKER: deferred queue_id=%s reason=any_device_http_failure", entry.id)
 
-        if locked_device_id is not None:
-            entry.device_id = locked_device_id
-            entry.server_id = locked_server_id
-            exp_log = ExperimentLog(
-                user_id=entry.user_id,
-                experiment_id=entry.experiment_id,
-                device_id=locked_device_id,
-                server_id=ensure(locked_server_id),
-                started_at=now(),
-                finished_at=None,
-                run=None,
-            )
-            session.add(exp_log)
-            session.flush()
-            entry.experiment_log_id = exp_log.id
-        else:
-            exp_log = session.get(ExperimentLog, entry.experiment_log_id)
-            if exp_log is not None and exp_log.started_at is None:
-                exp_log.started_at = now()
-                exp_log.modified_at = now()
 
-        session.commit()
-        logger.info("WORKER: submit accepted queue_id=%s job_id=%s", entry_id, job_id)
+def _on_accepted(session: Session, entry: ExperimentQueue, ctx: _SubmitContext) -> None:
+    entry.job_id = ctx.job_id
+    entry.status = QueueStatus.PENDING
+    entry.next_attempt_at = None
+    entry.poll_attempts = 0
+    simulation_time = float(ctx.payload_json.get("simulation_time") or 0.0)
+    entry.next_poll_at = first_poll_at(simulation_time)
+    entry.poll_deadline_at = poll_deadline(simulation_time)
+    entry.modified_at = queue_now()
 
+    if ctx.locked_device_id is not None:
+        entry.device_id = ctx.locked_device_id
+        entry.server_id = ctx.locked_server_id
+        exp_log = ExperimentLog(
+            user_id=entry.user_id,
+            experiment_id=entry.experiment_id,
+            device_id=ctx.locked_device_id,
+            server_id=ensure(ctx.locked_server_id),
+            started_at=now(),
+            finished_at=None,
+            run=None,
+        )
+        session.add(exp_log)
+        entry.experiment_log = exp_log
+    else:
+        exp_log = session.get(ExperimentLog, entry.experiment_log_id)
+        if exp_log is not None and exp_log.started_at is None:
+            exp_log.started_at = now()
+            exp_log.modified_at = now()
+
+    logger.info("WORKER: submit accepted queue_id=%s job_id=%s", entry.id, ctx.job_id)
 
-async def submit_entry(client: httpx.AsyncClient, entry_id: int) -> None:
-    ctx = await asyncio.to_thread(_prepare, entry_id)
-    if ctx is None:
-        return
 
-    logger.info("WORKER: submit request queue_id=%s url=%s", entry_id, ctx.url)
+def _apply_results(contexts: list[_SubmitContext]) -> None:
+    # every status transition of the tick is written back in one commit
+    with Session(engine) as session:
+        entries = {
+            entry.id: entry
+            for entry in session.exec(
+                select(ExperimentQueue).where(
+                    col(ExperimentQueue.id).in_([ctx.entry_id for ctx in contexts]),
+                    owned_by_worker(),
+                )
+            ).all()
+        }
+        for ctx in contexts:
+            entry = entries.get(ctx.entry_id)
+            if entry is None:
+                logger.warning("WORKER: lease lost before write-back queue_id=%s job_id=%s", ctx.entry_id, ctx.job_id)
+                continue
+            if ctx.job_id is not None:
+                _on_accepted(session, entry, ctx)
+            elif ctx.any_device_mode:
+                _on_defer(entry)
+            else:
+                _on_retry(entry)
+        session.commit()
+
+
+async def _post_submit(client: httpx.AsyncClient, ctx: _SubmitContext) -> None:
+    logger.info("WORKER: submit request queue_id=%s url=%s", ctx.entry_id, ctx.url)
     try:
         response = await client.post(
             ctx.url,
@@ -268,37 +321,63 @@ async def submit_entry(client: httpx.AsyncClient, entry_id: int) -> None:
             headers={"x-api-key": settings.EXPERIMENTAL_API_KEY},
         )
     except httpx.RequestError:
-        logger.info("WORKER: submit request failed queue_id=%s", entry_id)
-        if ctx.any_device_mode:
-            await asyncio.to_thread(_on_defer, entry_id)
-        else:
-            await asyncio.to_thread(_on_retry, entry_id)
+        logger.info("WORKER: submit request failed queue_id=%s", ctx.entry_id)
+        return
+    except Exception:
+        # e.g. httpx.InvalidURL; one bad entry must not sink the rest of the tick
+        logger.exception("WORKER: submit request error queue_id=%s", ctx.entry_id)
         return
 
-    logger.info("WORKER: submit response queue_id=%s status_code=%s", entry_id, response.status_code)
+    logger.info("WORKER: submit response queue_id=%s status_code=%s", ctx.entry_id, response.status_code)
 
     if response.status_code == 202:
         try:
-            job_id = response.json().get("job_id")
+            body = response.json()
         except ValueError:
-            job_id = None
+            body = None
+        job_id = body.get("job_id") if isinstance(body, dict) else None
         if job_id:
-            await asyncio.to_thread(
-                _on_accepted, entry_id, str(job_id),
-                ctx.locked_device_id, ctx.locked_server_id,
-            )
-            return
+            ctx.job_id = str(job_id)
+        else:
+            logger.warning("WORKER: submit accepted without job_id queue_id=%s", ctx.entry_id)
 
-    if ctx.any_device_mode:
-        await asyncio.to_thread(_on_defer, entry_id)
-    else:
-        await asyncio.to_thread(_on_retry, entry_id)
+
+async def _submit_limited(
+    client: httpx.AsyncClient,
+    ctx: _SubmitContext,
+    global_limit: asyncio.Semaphore,
+    server_limits: dict[int, asyncio.Semaphore],
+) -> None:
+    server_limit = server_limits.setdefault(
+        ctx.server_id,
+        asyncio.Semaphore(max(1, settings.EXPERIMENT_QUEUE_SUBMIT_PER_SERVER_CONCURRENCY)),
+    )
+    # the per-server slot is taken first so one slow server cannot hold global slots while waiting
+    async with server_limit, global_limit:
+        await _post_submit(client, ctx)
 
 
-async def run_submit_tick(client: httpx.AsyncClient) -> None:
+async def run_submit_tick(client: httpx.AsyncClient) -> int:
     entry_ids = await asyncio.to_thread(_fetch_submit_ids)
     if not entry_ids:
-        return
+        return 0
     logger.info("WORKER: submit tick count=%s", len(entry_ids))
-    for entry_id in entry_ids:
-        await submit_entry(client, entry_id)
+
+    async with leased(entry_ids):
+        contexts = await asyncio.to_thread(_prepare_batch, entry_ids)
+        if contexts:
+            global_limit = asyncio.Semaphore(max(1, settings.EXPERIMENT_QUEUE_SUBMIT_CONCURRENCY))
+            server_limits: dict[int, asyncio.Semaphore] = {}
+            try:
+                results = await asyncio.gather(
+                    *[_submit_limited(client, ctx, global_limit, server_limits) for ctx in contexts],
+                    return_exceptions=True,
+                )
+                for ctx, result in zip(contexts, results):
+                    if isinstance(result, BaseException):
+                        logger.error("WORKER: submit failed queue_id=%s", ctx.entry_id, exc_info=result)
+            finally:
+                # job ids the servers already accepted must be written back
+                # whatever happened to the other submits, or they run twice
+                await asyncio.to_thread(_apply_results, contexts)
+    return len(entry_ids)
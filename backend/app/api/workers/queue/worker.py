@@ -3,28 +3,56 @@ import logging
 
 import httpx
 
+from app.api.queue_events import subscribe_queue_wakeup, unsubscribe_queue_wakeup
 from app.core.config import settings
 from .poll import run_poll_tick
-from .submit import run_submit_tick
+from .submit import next_submit_delay, run_submit_tick
 
 logger = logging.getLogger("uvicorn.error")
 
+# floor between ticks, so rows another worker keeps failing on cannot spin this loop
+_MIN_SUBMIT_WAIT_SECONDS = 0.5
+
+
+async def _wait_for_wakeup(stop_event: asyncio.Event, wakeup: asyncio.Event, timeout: float) -> None:
+    waiters = [asyncio.create_task(stop_event.wait()), asyncio.create_task(wakeup.wait())]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
+async def _submit_wait_seconds(claimed: int) -> float:
+    if claimed >= settings.EXPERIMENT_QUEUE_BATCH_SIZE:
+        # a full batch means more entries are probably due right now
+        return 0.0
+    delay = await asyncio.to_thread(next_submit_delay)
+    max_idle = float(settings.EXPERIMENT_QUEUE_WORKER_MAX_IDLE_SECONDS)
+    if delay is None:
+        return max_idle
+    return min(max(delay, _MIN_SUBMIT_WAIT_SECONDS), max_idle)
+
 
 async def run_submit_worker(stop_event: asyncio.Event) -> None:
+    # runs when an entry is queued (in-process event or NOTIFY from another
+    # process) or when the earliest deferred entry becomes due
     logger.info("WORKER: submit worker started")
-    async with httpx.AsyncClient(timeout=settings.EXPERIMENT_QUEUE_REQUEST_TIMEOUT_SECONDS) as client:
-        while not stop_event.is_set():
-            try:
-                await run_submit_tick(client)
-            except Exception:
-                logger.exception("WORKER: submit tick failed")
-            try:
-                await asyncio.wait_for(
-                    stop_event.wait(),
-                    timeout=settings.EXPERIMENT_QUEUE_WORKER_INTERVAL_SECONDS,
-                )
-            except asyncio.TimeoutError:
-                pass
+    wakeup = subscribe_queue_wakeup()
+    try:
+        async with httpx.AsyncClient(timeout=settings.EXPERIMENT_QUEUE_REQUEST_TIMEOUT_SECONDS) as client:
+            while not stop_event.is_set():
+                wakeup.clear()
+                try:
+                    claimed = await run_submit_tick(client)
+                    timeout = await _submit_wait_seconds(claimed)
+                except Exception:
+                    logger.exception("WORKER: submit tick failed")
+                    timeout = settings.EXPERIMENT_QUEUE_WORKER_INTERVAL_SECONDS
+                if timeout > 0:
+                    await _wait_for_wakeup(stop_event, wakeup, timeout)
+    finally:
+        unsubscribe_queue_wakeup(wakeup)
     logger.info("WORKER: submit worker stopped")
 
 
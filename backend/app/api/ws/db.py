@@ -0,0 +1,40 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+_db_executor_lock = Lock()
+_db_executor: ThreadPoolExecutor | None = None
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.EXPERIMENT_WS_DB_MAX_WORKERS),
+                    thread_name_prefix="ws-db",
+                )
+    return _db_executor
+
+
+async def run_db(fn: Callable[..., T], *args: Any) -> T:
+    # sync SQLModel sessions run on a bounded pool instead of the event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_db_executor(), partial(fn, *args))
+
+
+def shutdown_db_executor() -> None:
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is not None:
+            _db_executor.shutdown(wait=True)
+            _db_executor = None
@@ -0,0 +1,75 @@
+import json
+import math
+import struct
+import sys
+from array import array
+from enum import Enum
+from importlib.util import find_spec
+from typing import Any
+
+
+class FrameMode(str, Enum):
+    # json forwards every upstream frame as-is; the others coalesce samples
+    JSON = "json"
+    BATCH = "batch"
+    MSGPACK = "msgpack"
+    PACKED = "packed"
+
+
+def frame_mode_available(mode: FrameMode) -> bool:
+    if mode == FrameMode.MSGPACK:
+        return find_spec("msgpack") is not None
+    return True
+
+
+def _packed_value(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def encode_packed(samples: list[dict[str, Any]], next_index: int) -> bytes:
+    # <u32 header length><json header><float64 column per channel, little-endian>
+    # missing and non-numeric values are NaN
+    channels: dict[str, None] = {}
+    for sample in samples:
+        channels.update(dict.fromkeys(sample))
+
+    header = json.dumps(
+        {"count": len(samples), "next_index": next_index, "channels": list(channels)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    body = array("d", (_packed_value(sample.get(name)) for name in channels for sample in samples))
+    if sys.byteorder != "little":
+        body.byteswap()
+    return struct.pack("<I", len(header)) + header + body.tobytes()
+
+
+class SampleBatch:
+    def __init__(self, mode: FrameMode) -> None:
+        self.mode = mode
+        self.raw: list[str] = []
+        self.samples: list[dict[str, Any]] = []
+        self.next_index = 0
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def add(self, raw: str, sample: dict[str, Any], next_index: int) -> None:
+        self.raw.append(raw)
+        self.samples.append(sample)
+        self.next_index = next_index
+
+    def encode(self) -> str | bytes:
+        if self.mode == FrameMode.MSGPACK:
+            import msgpack
+
+            return msgpack.packb({"samples": self.samples, "next_index": self.next_index})
+        if self.mode == FrameMode.PACKED:
+            return encode_packed(self.samples, self.next_index)
+        # upstream text is spliced in verbatim, no re-serialization
+        return f'{{"samples":[{",".join(self.raw)}],"next_index":{self.next_index}}}'
+
+    def clear(self) -> None:
+        self.raw = []
+        self.samples = []
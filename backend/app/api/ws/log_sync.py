@@ -1,6 +1,4 @@
-import json
 from collections import deque
-from json import JSONDecodeError
 
 from sqlmodel import Session, select
 
@@ -18,6 +16,9 @@ class _PendingExperimentLogIds:
     def push(self, experiment_log_id: int) -> None:
         self._ids.append(experiment_log_id)
 
+    def __len__(self) -> int:
+        return len(self._ids)
+
     def pop(self) -> int | None:
         if not self._ids:
             return None
@@ -124,22 +125,8 @@ def _sync_next_log_with_terminal_payload(
             db_experiment_log.finished_at = remote_finished_at
 
         db_experiment_log.finish_reason = remote_finish_reason
-        db_experiment_log.run = remote_runs
+        db_experiment_log.store_run(remote_runs)
         db_experiment_log.modified_at = now()
         session.add(db_experiment_log)
         session.commit()
 
-
-def _sync_log_from_upstream_message(
-    pending_log_ids: _PendingExperimentLogIds,
-    raw_message: str,
-) -> None:
-    try:
-        payload = json.loads(raw_message)
-    except JSONDecodeError:
-        return
-
-    if not isinstance(payload, dict):
-        return
-
-    _sync_next_log_with_terminal_payload(pending_log_ids, payload)
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import suppress
+from dataclasses import dataclass
+from enum import Enum
+from itertools import islice
+
+from fastapi import WebSocket, status
+
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+@dataclass(slots=True)
+class _Frame:
+    data: str | bytes
+    # sample frames may be dropped or merged; control frames never are
+    droppable: bool = False
+    # raw JSON samples and the cursor after them, lets coalescing splice frames
+    samples: list[str] | None = None
+    next_index: int | None = None
+    # samples dropped just before this frame
+    gap: int = 0
+
+    def encode(self) -> str | bytes:
+        if self.samples is None or (len(self.samples) == 1 and not self.gap):
+            return self.data
+        # a run of samples, or one following a drop, goes out as a live frame:
+        # clients handle each sample like a single live one, then take the
+        # exact cursor (replay frames skip the live-sample handling)
+        return (
+            f'{{"live":{{"samples":[{",".join(self.samples)}],'
+            f'"next_index":{self.next_index},"dropped":{self.gap}}}}}'
+        )
+
+
+outbound_stats: dict[str, int] = {
+    "frames_sent": 0,
+    "frames_dropped": 0,
+    "frames_coalesced": 0,
+    "slow_client_disconnects": 0,
+}
+
+
+class ClientWriter:
+    # a bounded outbound queue drained by its own task, so the upstream
+    # receiver never awaits a browser
+    def __init__(self, ws: WebSocket, max_frames: int, policy: OverflowPolicy, coalesce_max_samples: int) -> None:
+        self.ws = ws
+        self.max_frames = max(1, max_frames)
+        self.coalesce_max_samples = max(1, coalesce_max_samples)
+        self.policy = policy
+        self.queue: deque[_Frame] = deque()
+        # frames that go out ahead of the queue; while held the queue waits
+        # behind them (a resume replay still being encoded)
+        self.head: deque[_Frame] = deque()
+        self.held = False
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.close_code: int | None = None
+        self.close_reason = ""
+        self.max_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+        # dropped samples not yet reported, carried by the next sample frame
+        self.gap = 0
+        self.task = asyncio.create_task(self._run())
+
+    @property
+    def depth(self) -> int:
+        return len(self.head) + len(self.queue)
+
+    def hold(self) -> None:
+        # what is queued so far still goes out first; later frames wait for release
+        self.head.extend(self.queue)
+        self.queue.clear()
+        self.held = True
+
+    def release(self, frames: list[str]) -> None:
+        if self.closed or not self.held:
+            return
+        self.head.extend(_Frame(frame) for frame in frames)
+        self.held = False
+        self.ready.set()
+
+    def send(self, data: str | bytes, droppable: bool = False, next_index: int | None = None) -> None:
+        if self.closed or self.close_code is not None:
+            return
+
+        if droppable and len(self.queue) >= self.max_frames and not self._make_room():
+            return
+
+        frame = _Frame(data, droppable)
+        if next_index is not None and isinstance(data, str):
+            frame.samples, frame.next_index = [data], next_index
+            frame.gap, self.gap = self.gap, 0
+        self.queue.append(frame)
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.ready.set()
+
+    def _make_room(self) -> bool:
+        if self.policy == OverflowPolicy.DISCONNECT:
+            outbound_stats["slow_client_disconnects"] += 1
+            logger.warning("Disconnecting slow websocket client depth=%s", len(self.queue))
+            self.queue.clear()
+            self.request_close(status.WS_1008_POLICY_VIOLATION, "client too slow")
+            return False
+
+        if self.policy == OverflowPolicy.COALESCE and self._coalesce():
+            return True
+
+        for index, frame in enumerate(self.queue):
+            if frame.droppable:
+                del self.queue[index]
+                self._carry_gap(index, frame)
+                self.dropped += 1
+                outbound_stats["frames_dropped"] += 1
+                return True
+
+        # only control frames queued; they are rare, let the queue grow
+        return True
+
+    def _carry_gap(self, index: int, dropped: _Frame) -> None:
+        # live JSON samples advance the client cursor one by one, so the next
+        # sample frame re-syncs it; batch frames carry an absolute cursor already
+        if dropped.samples is None:
+            return
+        count = len(dropped.samples) + dropped.gap
+        for frame in islice(self.queue, index, None):
+            if frame.samples is not None:
+                frame.gap += count
+                return
+        self.gap += count
+
+    def _coalesce(self) -> bool:
+        # fold neighbouring sample frames together, up to the replay batch size
+        kept: deque[_Frame] = deque()
+        merged = 0
+        for frame in self.queue:
+            previous = kept[-1] if kept else None
+            if (
+                frame.samples is not None
+                and previous is not None
+                and previous.samples is not None
+                and len(previous.samples) + len(frame.samples) <= self.coalesce_max_samples
+            ):
+                previous.samples.extend(frame.samples)
+                previous.next_index = frame.next_index
+                previous.gap += frame.gap
+                merged += 1
+                continue
+            kept.append(frame)
+
+        if not merged:
+            return False
+        self.queue = kept
+        self.coalesced += merged
+        outbound_stats["frames_coalesced"] += merged
+        return True
+
+    def request_close(self, code: int, reason: str) -> None:
+        if self.close_code is None:
+            self.close_code = code
+            self.close_reason = reason
+            # do not wait for a replay that is still being encoded
+            self.held = False
+            self.ready.set()
+
+    async def close(self, code: int, reason: str, timeout: float) -> None:
+        # queued frames (e.g. the reason text) go out before the close frame
+        self.request_close(code, reason)
+        try:
+            await asyncio.wait_for(asyncio.shield(self.task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+            with suppress(Exception):
+                await self.ws.close(code=code, reason=reason)
+
+    def stop(self) -> None:
+        self.closed = True
+        self.head.clear()
+        self.queue.clear()
+        self.task.cancel()
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                if self.head:
+                    frame = self.head.popleft()
+                elif self.queue and not self.held:
+                    frame = self.queue.popleft()
+                elif self.close_code is not None:
+                    break
+                else:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+
+                data = frame.encode()
+                if isinstance(data, bytes):
+                    await self.ws.send_bytes(data)
+                else:
+                    await self.ws.send_text(data)
+                outbound_stats["frames_sent"] += 1
+
+            with suppress(Exception):
+                await self.ws.close(code=self.close_code or status.WS_1000_NORMAL_CLOSURE, reason=self.close_reason)
+        except Exception:
+            pass
+        finally:
+            self.closed = True
+            self.head.clear()
+            self.queue.clear()
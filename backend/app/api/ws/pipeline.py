@@ -0,0 +1,106 @@
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+from importlib.util import find_spec
+from typing import Any
+
+
+if find_spec("orjson") is not None:
+    import orjson
+
+    _json_loads: Callable[[str | bytes], Any] = orjson.loads
+    JSON_BACKEND = "orjson"
+else:
+    _json_loads = json.loads
+    JSON_BACKEND = "json"
+
+
+class MessageKind(str, Enum):
+    BINARY = "binary"
+    OPAQUE = "opaque"
+    ERROR = "error"
+    SAMPLE = "sample"
+    TERMINAL = "terminal"
+    CONTROL = "control"
+
+
+@dataclass(slots=True)
+class UpstreamMessage:
+    raw: str | bytes
+    kind: MessageKind
+    payload: dict[str, Any] | None = None
+    has_run_signal: bool = False
+
+
+class PipelineStats:
+    def __init__(self) -> None:
+        self.stage_calls: dict[str, int] = {}
+        self.stage_seconds: dict[str, float] = {}
+        self.kinds: dict[str, int] = {}
+
+    def record(self, stage: str, started_at: float) -> float:
+        finished_at = time.perf_counter()
+        self.stage_calls[stage] = self.stage_calls.get(stage, 0) + 1
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + finished_at - started_at
+        return finished_at
+
+    def count(self, kind: MessageKind) -> None:
+        self.kinds[kind.value] = self.kinds.get(kind.value, 0) + 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "json_backend": JSON_BACKEND,
+            "kinds": dict(self.kinds),
+            "stages": {
+                stage: {
+                    "calls": calls,
+                    "total_ms": round(self.stage_seconds[stage] * 1000, 3),
+                    "avg_us": round(self.stage_seconds[stage] * 1_000_000 / calls, 3),
+                }
+                for stage, calls in self.stage_calls.items()
+            },
+        }
+
+
+pipeline_stats = PipelineStats()
+
+
+def decode_message(raw: str | bytes) -> dict[str, Any] | None:
+    if isinstance(raw, bytes):
+        return None
+    try:
+        payload = _json_loads(raw)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def classify_message(raw: str | bytes, payload: dict[str, Any] | None) -> UpstreamMessage:
+    if payload is None:
+        return UpstreamMessage(raw, MessageKind.BINARY if isinstance(raw, bytes) else MessageKind.OPAQUE)
+
+    # one pass over the keys decides everything downstream needs
+    has_error = has_time = has_run = has_finish = False
+    for key in payload:
+        if key == "error":
+            has_error = True
+        elif key == "time":
+            has_time = True
+        elif key == "run" or key == "runs":
+            has_run = True
+        elif key == "finished_at" or key == "finish_reason":
+            has_finish = True
+
+    if has_error:
+        return UpstreamMessage(raw, MessageKind.ERROR, payload)
+
+    has_run_signal = has_time or has_run or has_finish
+    if has_run or has_finish:
+        kind = MessageKind.TERMINAL
+    elif has_time:
+        kind = MessageKind.SAMPLE
+    else:
+        kind = MessageKind.CONTROL
+    return UpstreamMessage(raw, kind, payload, has_run_signal)
@@ -0,0 +1,135 @@
+import logging
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.api.dependencies import CONNECT_ARGS, engine
+from app.api.ws.db import run_db
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+HANDOFF_CHANNEL = "olm_reservation_handoff"
+# first key of the two-key advisory lock, keeps our locks apart from anyone else's
+_ADVISORY_LOCK_NAMESPACE = 0x4F4C4D
+
+
+class _SessionRegistry(ABC):
+    # decides which worker process owns a reservation's upstream session
+
+    @abstractmethod
+    async def acquire(self, reservation_id: int) -> bool: ...
+
+    @abstractmethod
+    async def release(self, reservation_id: int) -> None: ...
+
+    @abstractmethod
+    async def request_handoff(self, reservation_id: int) -> None: ...
+
+
+class _LocalSessionRegistry(_SessionRegistry):
+    async def acquire(self, reservation_id: int) -> bool:
+        return True
+
+    async def release(self, reservation_id: int) -> None:
+        return None
+
+    async def request_handoff(self, reservation_id: int) -> None:
+        return None
+
+
+class _PostgresSessionRegistry(_SessionRegistry):
+    # ownership is a session-level advisory lock held on a dedicated connection,
+    # so it is released by Postgres if the owning process dies
+    def __init__(self) -> None:
+        self._lock_engine = create_engine(
+            settings.SQLALCHEMY_DATABASE_URI,
+            connect_args=CONNECT_ARGS,
+            poolclass=NullPool,
+        )
+        self._held_lock = Lock()
+        # reservation_id -> (lock connection, local holders)
+        self._held: dict[int, tuple[Any, int]] = {}
+
+    def _try_lock(self, reservation_id: int) -> bool:
+        with self._held_lock:
+            held = self._held.get(reservation_id)
+            if held is not None:
+                self._held[reservation_id] = (held[0], held[1] + 1)
+                return True
+
+        connection = self._lock_engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            locked = connection.execute(
+                text("SELECT pg_try_advisory_lock(:namespace, :reservation_id)"),
+                {"namespace": _ADVISORY_LOCK_NAMESPACE, "reservation_id": reservation_id},
+            ).scalar()
+        except Exception:
+            connection.close()
+            raise
+
+        if not locked:
+            connection.close()
+            return False
+
+        with self._held_lock:
+            held = self._held.get(reservation_id)
+            if held is not None:
+                self._held[reservation_id] = (held[0], held[1] + 1)
+                connection.close()
+            else:
+                self._held[reservation_id] = (connection, 1)
+        return True
+
+    def _unlock(self, reservation_id: int) -> None:
+        with self._held_lock:
+            held = self._held.get(reservation_id)
+            if held is None:
+                return
+            connection, holders = held
+            if holders > 1:
+                self._held[reservation_id] = (connection, holders - 1)
+                return
+            del self._held[reservation_id]
+
+        # closing the connection drops the lock even if the unlock fails
+        try:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:namespace, :reservation_id)"),
+                {"namespace": _ADVISORY_LOCK_NAMESPACE, "reservation_id": reservation_id},
+            )
+        finally:
+            connection.close()
+
+    def _notify_handoff(self, reservation_id: int) -> None:
+        with engine.connect() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": HANDOFF_CHANNEL, "payload": str(reservation_id)},
+            )
+            connection.commit()
+
+    async def acquire(self, reservation_id: int) -> bool:
+        return await run_db(self._try_lock, reservation_id)
+
+    async def release(self, reservation_id: int) -> None:
+        try:
+            await run_db(self._unlock, reservation_id)
+        except Exception:
+            logger.exception("Failed to release reservation session lock reservation_id=%s", reservation_id)
+
+    async def request_handoff(self, reservation_id: int) -> None:
+        await run_db(self._notify_handoff, reservation_id)
+
+
+def _build_session_registry() -> _SessionRegistry:
+    if settings.WS_SESSION_REGISTRY == "postgres":
+        return _PostgresSessionRegistry()
+    return _LocalSessionRegistry()
+
+
+session_registry = _build_session_registry()
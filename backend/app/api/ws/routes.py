@@ -1,13 +1,32 @@
 import json
 from contextlib import suppress
 
-from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from pydantic import ValidationError
-from sqlmodel import asc, select
-
-from app.api.dependencies import AuthUser, CurrentUser, CurrentUserWs, DbSession, PermissionWs
+from sqlmodel import Session, asc, select
+
+from app.api.dependencies import (
+    AuthUser,
+    CurrentUser,
+    CurrentUserWs,
+    DbSession,
+    PermissionWs,
+    engine,
+    permission_cache,
+    user_cache,
+)
 from app.api.endpoints.server import resolve_url
-from app.api.ws.session import _ReservationContext, _get_or_create_reservation_session
+from app.api.usernames import username_directory
+from app.api.ws.db import run_db
+from app.api.ws.frames import FrameMode, frame_mode_available
+from app.api.ws.outbound import outbound_stats
+from app.api.ws.pipeline import pipeline_stats
+from app.api.ws.session import (
+    _ReservationContext,
+    _get_or_create_reservation_session,
+    _live_reservation_session,
+    upstream_stats_snapshot,
+)
 from app.api.ws.stream_buffer import _read_stream_samples
 from app.core.config import settings
 from app.models.reservation import Reservation
@@ -55,66 +74,100 @@ def get_current_stream_buffer(
             "reservation_id": None,
             "samples": [],
             "next_index": after_index,
+            "first_index": 0,
+            "dropped": 0,
             "total": 0,
         }
 
-    samples, next_index, total = _read_stream_samples(db_reservation.id, after_index)
+    samples, next_index, first_index, dropped = _read_stream_samples(db_reservation.id, after_index)
     return {
         "reservation_id": db_reservation.id,
         "samples": samples,
         "next_index": next_index,
-        "total": total,
+        "first_index": first_index,
+        "dropped": dropped,
+        "total": next_index,
+    }
+
+
+@ws_router.get("/stats")
+def get_stats(user: CurrentUser):
+    if not user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return {
+        "pipeline": pipeline_stats.snapshot(),
+        "upstream": upstream_stats_snapshot(),
+        "outbound": dict(outbound_stats),
+        "auth": {
+            "users": user_cache.stats(),
+            "permissions": permission_cache.stats(),
+            "usernames": username_directory.cache.stats(),
+        },
     }
 
 
+def _load_reservation_context(user_id: int) -> tuple[_ReservationContext | None, int, str]:
+    with Session(engine) as db:
+        db_reservation = _get_current_reservation(db, user_id)
+        if db_reservation is None:
+            return None, status.WS_1008_POLICY_VIOLATION, "no reservation for user"
+
+        reservation_id = db_reservation.id
+        if reservation_id is None:
+            return None, status.WS_1011_INTERNAL_ERROR, "reservation id missing"
+
+        db_device = db_reservation.device
+        if db_device is None or db_device.id is None:
+            return None, status.WS_1011_INTERNAL_ERROR, "reservation device missing"
+
+        db_server = db_device.server
+        if db_server is None or db_server.id is None:
+            return None, status.WS_1011_INTERNAL_ERROR, "reservation server missing"
+
+        if not (db_server.available and db_server.enabled and db_server.production):
+            return None, status.WS_1008_POLICY_VIOLATION, "server unavailable"
+
+        base_url = resolve_url(db_server)
+        if not base_url:
+            return None, status.WS_1003_UNSUPPORTED_DATA, "no server api domain found"
+
+        ctx = _ReservationContext(
+            reservation_id=reservation_id,
+            user_id=user_id,
+            device_id=db_device.id,
+            device_name=db_device.name,
+            server_id=db_server.id,
+            api_url=_to_websocket_url(base_url, settings.EXPERIMENT_WS_PATH),
+        )
+        return ctx, status.WS_1000_NORMAL_CLOSURE, ""
+
+
 @ws_router.websocket("/reservation/current")
 async def reservation_proxy(
-    db: DbSession,
     websocket: WebSocket,
     user: CurrentUserWs,
+    resume_from: int | None = Query(default=None, ge=0),
+    frames: FrameMode = Query(default=FrameMode.JSON),
 ):
     await websocket.accept()
 
-    db_reservation = _get_current_reservation(db, user.id)
-    if db_reservation is None:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="no reservation for user")
-        return
-
-    reservation_id = db_reservation.id
-    if reservation_id is None:
-        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="reservation id missing")
+    if not frame_mode_available(frames):
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"{frames.value} frames not supported")
         return
 
-    db_device = db_reservation.device
-    if db_device is None or db_device.id is None:
-        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="reservation device missing")
+    ctx, close_code, close_reason = await run_db(_load_reservation_context, user.id)
+    if ctx is None:
+        await websocket.close(code=close_code, reason=close_reason)
         return
 
-    db_server = db_device.server
-    if db_server is None or db_server.id is None:
-        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="reservation server missing")
+    session = await _get_or_create_reservation_session(ctx)
+    if session is None:
+        # another worker owns the session and is finishing a run; it hands the
+        # session off once the run is synced, so the client should retry
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="session busy on another worker, retry")
         return
 
-    if not (db_server.available and db_server.enabled and db_server.production):
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="server unavailable")
-        return
-
-    base_url = resolve_url(db_server)
-    if not base_url:
-        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="no server api domain found")
-        return
-
-    ctx = _ReservationContext(
-        reservation_id=reservation_id,
-        user_id=user.id,
-        device_id=db_device.id,
-        device_name=db_device.name,
-        server_id=db_server.id,
-        api_url=_to_websocket_url(base_url, settings.EXPERIMENT_WS_PATH),
-    )
-    session = _get_or_create_reservation_session(ctx)
-
-    if not await session.set_client(websocket):
+    if not await session.set_client(websocket, resume_from, frames):
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="already open in another window")
         return
 
@@ -132,7 +185,7 @@ async def reservation_proxy(
                 try:
                     raw_payload = data_payload.decode("utf-8")
                 except UnicodeDecodeError:
-                    await websocket.send_text(json.dumps({"error": "payload must be utf-8 json"}))
+                    session.send_to(websocket, json.dumps({"error": "payload must be utf-8 json"}))
                     continue
 
             if raw_payload is None:
@@ -141,7 +194,45 @@ async def reservation_proxy(
             try:
                 await session.enqueue_client_payload(raw_payload)
             except (ValidationError, ValueError) as e:
-                await websocket.send_text(json.dumps({"error": f"invalid experiment payload: {e}"}))
+                session.send_to(websocket, json.dumps({"error": f"invalid experiment payload: {e}"}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.clear_client(websocket)
+        with suppress(Exception):
+            await websocket.close()
+
+
+@ws_router.websocket("/reservation/{reservation_id}/watch")
+async def reservation_spectator(
+    websocket: WebSocket,
+    reservation_id: int,
+    user: AuthUser = PermissionWs("olm.reservation.watch_all"),
+    resume_from: int | None = Query(default=None, ge=0),
+    frames: FrameMode = Query(default=FrameMode.JSON),
+):
+    await websocket.accept()
+
+    if not frame_mode_available(frames):
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"{frames.value} frames not supported")
+        return
+
+    # spectators never open a device connection, they join the owner's session
+    session = _live_reservation_session(reservation_id)
+    if session is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="reservation stream not live")
+        return
+
+    if not await session.add_spectator(websocket, resume_from, frames):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="too many spectators")
+        return
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                break
+            session.send_to(websocket, json.dumps({"error": "spectators cannot send commands"}))
     except WebSocketDisconnect:
         pass
     finally:
@@ -1,6 +1,8 @@
 import asyncio
 import json
 import logging
+import random
+import time
 from contextlib import suppress
 from dataclasses import dataclass
 from json import JSONDecodeError
@@ -9,9 +11,10 @@ from threading import Lock
 from fastapi import WebSocket, WebSocketDisconnect, status
 from sqlmodel import Session, select
 from websockets import connect
-from websockets.exceptions import ConnectionClosed
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
 
 from app.api.dependencies import engine
+from app.api.reservation_events import register_channel, subscribe_reservation
 from app.core.config import settings
 from app.models.experiment import Command
 from app.models.reservation import Reservation
@@ -21,13 +24,20 @@ from app.api.ws.log_sync import (
     _create_experiment_log_for_payload,
     _delete_experiment_log,
     _mark_experiment_log_as_error,
-    _sync_log_from_upstream_message,
+    _sync_next_log_with_terminal_payload,
 )
+from app.api.ws.db import run_db
+from app.api.ws.frames import FrameMode, SampleBatch
+from app.api.ws.outbound import ClientWriter, OverflowPolicy
+from app.api.ws.pipeline import MessageKind, UpstreamMessage, classify_message, decode_message, pipeline_stats
 from app.api.ws.payload import _resolve_device_name_from_payload, _to_experiment_queue_payload
+from app.api.ws.registry import HANDOFF_CHANNEL, session_registry
 from app.api.ws.stream_buffer import (
     _append_stream_sample,
     _clear_stream_buffer,
-    _extract_partial_stream_sample,
+    _drop_stream_buffer,
+    _RingSnapshot,
+    _snapshot_stream_samples,
 )
 
 
@@ -36,6 +46,13 @@ logger = logging.getLogger(__name__)
 _reservation_sessions_lock = Lock()
 _reservation_sessions: dict[int, "_ReservationUpstreamSession"] = {}
 
+_upstream_stats: dict[str, float] = {
+    "drops": 0,
+    "reconnects": 0,
+    "failed_sessions": 0,
+    "downtime_seconds": 0.0,
+}
+
 
 @dataclass
 class _ReservationContext:
@@ -47,6 +64,15 @@ class _ReservationContext:
     api_url: str
 
 
+@dataclass(eq=False)
+class _Subscriber:
+    ws: WebSocket
+    writer: ClientWriter
+    frame_mode: FrameMode
+    owner: bool
+    replay_task: asyncio.Task[None] | None = None
+
+
 @dataclass
 class _QueuedCommand:
     payload_json: str
@@ -54,17 +80,40 @@ class _QueuedCommand:
     experiment_log_id: int | None
 
 
-def _reservation_state(reservation_id: int) -> tuple[bool, str]:
+def _encode_replay(snapshot: _RingSnapshot, batch_size: int) -> list[str]:
+    samples = snapshot.samples()
+    batch_size = max(1, batch_size)
+    start_index = snapshot.next_seq - len(samples)
+    dropped = snapshot.dropped
+    frames: list[str] = []
+    offset = 0
+    while True:
+        batch = samples[offset:offset + batch_size]
+        offset += len(batch)
+        frames.append(json.dumps({"replay": {
+            "samples": batch,
+            "next_index": start_index + offset,
+            "first_index": snapshot.first_seq,
+            "dropped": dropped,
+            "done": offset >= len(samples),
+        }}))
+        dropped = 0
+        if offset >= len(samples):
+            return frames
+
+
+def _reservation_state(reservation_id: int) -> tuple[bool, str, float]:
     with Session(engine) as session:
         reservation_end = session.exec(select(Reservation.end).where(Reservation.id == reservation_id)).first()
 
     if reservation_end is None:
-        return False, "reservation deleted"
+        return False, "reservation deleted", 0.0
 
-    if reservation_end <= now():
-        return False, "reservation expired"
+    remaining = (reservation_end - now()).total_seconds()
+    if remaining <= 0:
+        return False, "reservation expired", 0.0
 
-    return True, "reservation active"
+    return True, "reservation active", remaining
 
 
 def _remaining_reservation_seconds(reservation_id: int) -> float | None:
@@ -93,45 +142,212 @@ class _ReservationUpstreamSession:
         self.last_sent_command: Command | None = None
 
         self.command_queue: asyncio.Queue[_QueuedCommand] = asyncio.Queue()
+        # the owner's socket; spectators only ever receive
         self.client: WebSocket | None = None
+        self.subscribers: list[_Subscriber] = []
+        # one batch per binary/batched frame mode in use, encoded once per flush
+        self.sample_batches: dict[FrameMode, SampleBatch] = {}
+        self.batch_flush_handle: asyncio.TimerHandle | None = None
         self.stop_event = asyncio.Event()
         self.runner_task: asyncio.Task[None] | None = None
+        self.upstream_ws = None
+        self.retry_command: _QueuedCommand | None = None
+        self.reconnects = 0
+        self.downtime_seconds = 0.0
+        self.down_since: float | None = None
+        # set when another worker asked for the session while a run was in flight
+        self.handoff_requested = False
         self.closed = False
 
+    @property
+    def has_run_in_flight(self) -> bool:
+        # a run's log can only be finalized by the session that saw it start
+        return bool(
+            self.pending_log_ids
+            or self.pending_start_attempt_ids
+            or self.retry_command is not None
+            or not self.command_queue.empty()
+        )
+
+    def can_hand_off(self) -> bool:
+        # spectators do not hold the session, they are closed when it ends
+        return self.client is None and not self.has_run_in_flight
+
+    def hand_off_if_requested(self) -> None:
+        if self.handoff_requested and not self.closed and self.can_hand_off():
+            logger.info("Handing off idle reservation session reservation_id=%s", self.reservation_id)
+            asyncio.ensure_future(self.shutdown("session handed off"))
+
     def start(self) -> None:
         if self.runner_task is not None and not self.runner_task.done():
             return
 
         self.runner_task = asyncio.create_task(self._run())
 
-    async def set_client(self, ws: WebSocket) -> bool:
+    async def shutdown(self, reason: str) -> None:
+        self.stop_event.set()
+        if self.upstream_ws is not None:
+            with suppress(Exception):
+                await self.upstream_ws.close(code=status.WS_1000_NORMAL_CLOSURE, reason=reason)
+
+    async def set_client(
+        self,
+        ws: WebSocket,
+        resume_from: int | None = None,
+        frame_mode: FrameMode = FrameMode.JSON,
+    ) -> bool:
         if self.client is not None:
             return False
 
         self.client = ws
-        with suppress(Exception):
-            await ws.send_text("Connected, reservation is ok")
+        self.handoff_requested = False
+        self._attach(ws, resume_from, frame_mode, owner=True)
+        return True
+
+    async def add_spectator(
+        self,
+        ws: WebSocket,
+        resume_from: int | None = None,
+        frame_mode: FrameMode = FrameMode.JSON,
+    ) -> bool:
+        spectators = sum(1 for subscriber in self.subscribers if not subscriber.owner)
+        if self.closed or spectators >= settings.EXPERIMENT_WS_MAX_SPECTATORS:
+            return False
+
+        self._attach(ws, resume_from, frame_mode, owner=False)
         return True
 
+    def _attach(self, ws: WebSocket, resume_from: int | None, frame_mode: FrameMode, owner: bool) -> None:
+        # pending batches go out first, otherwise the new subscriber would get
+        # their samples both in the replay and in the next flush
+        self._flush_sample_batch()
+        subscriber = _Subscriber(
+            ws=ws,
+            writer=ClientWriter(
+                ws,
+                settings.EXPERIMENT_WS_CLIENT_QUEUE_MAX_FRAMES,
+                OverflowPolicy(settings.EXPERIMENT_WS_CLIENT_OVERFLOW_POLICY),
+                settings.EXPERIMENT_WS_REPLAY_BATCH_SIZE,
+            ),
+            frame_mode=frame_mode,
+            owner=owner,
+        )
+        self.subscribers.append(subscriber)
+        if frame_mode != FrameMode.JSON and frame_mode not in self.sample_batches:
+            self.sample_batches[frame_mode] = SampleBatch(frame_mode)
+
+        subscriber.writer.send("Connected, reservation is ok" if owner else "Watching reservation")
+        if resume_from is not None:
+            # the snapshot is a slice copy taken without yielding, so every
+            # sample appended after it is a live frame; those wait behind the
+            # replay, which is built and encoded in a thread
+            snapshot = _snapshot_stream_samples(self.reservation_id, resume_from)
+            subscriber.writer.hold()
+            subscriber.replay_task = asyncio.create_task(self._replay(subscriber.writer, snapshot))
+
+    async def _replay(self, writer: ClientWriter, snapshot: _RingSnapshot) -> None:
+        frames: list[str] = []
+        try:
+            frames = await asyncio.to_thread(_encode_replay, snapshot, settings.EXPERIMENT_WS_REPLAY_BATCH_SIZE)
+        except Exception:
+            logger.exception("Failed to build stream replay reservation_id=%s", self.reservation_id)
+        finally:
+            writer.release(frames)
+
     async def clear_client(self, ws: WebSocket) -> None:
+        for subscriber in self.subscribers:
+            if subscriber.ws is ws:
+                self.subscribers.remove(subscriber)
+                subscriber.writer.stop()
+                if subscriber.replay_task is not None:
+                    subscriber.replay_task.cancel()
+                break
         if self.client is ws:
             self.client = None
 
-    async def _send_text(self, message: str) -> None:
-        if self.client is not None:
-            with suppress(Exception):
-                await self.client.send_text(message)
+        in_use = {subscriber.frame_mode for subscriber in self.subscribers}
+        for frame_mode in list(self.sample_batches):
+            if frame_mode not in in_use:
+                del self.sample_batches[frame_mode]
+        if not self.sample_batches:
+            self._cancel_batch_flush()
+
+    def send_to(self, ws: WebSocket, message: str) -> None:
+        for subscriber in self.subscribers:
+            if subscriber.ws is ws:
+                subscriber.writer.send(message)
+                return
 
-    async def _send_bytes(self, data: bytes) -> None:
-        if self.client is not None:
-            with suppress(Exception):
-                await self.client.send_bytes(data)
+    # frames are encoded once and queued for every subscriber; only the
+    # per-subscriber writer tasks await a socket
+    def _send_text(self, message: str) -> None:
+        for subscriber in self.subscribers:
+            subscriber.writer.send(message)
+
+    def _send_bytes(self, data: bytes) -> None:
+        for subscriber in self.subscribers:
+            subscriber.writer.send(data)
+
+    def _cancel_batch_flush(self) -> None:
+        if self.batch_flush_handle is not None:
+            self.batch_flush_handle.cancel()
+            self.batch_flush_handle = None
+
+    def _on_batch_window_elapsed(self) -> None:
+        self.batch_flush_handle = None
+        self._flush_sample_batch()
+
+    def _flush_sample_batch(self) -> None:
+        self._cancel_batch_flush()
+        for frame_mode, batch in self.sample_batches.items():
+            if not batch:
+                continue
+
+            frame = batch.encode()
+            batch.clear()
+            for subscriber in self.subscribers:
+                if subscriber.frame_mode == frame_mode:
+                    subscriber.writer.send(frame, droppable=True)
+
+    def _forward_sample(self, message: str, sample: dict, next_index: int) -> None:
+        for subscriber in self.subscribers:
+            if subscriber.frame_mode == FrameMode.JSON:
+                subscriber.writer.send(message, droppable=True, next_index=next_index)
+
+        if not self.sample_batches:
+            return
+
+        full = False
+        for batch in self.sample_batches.values():
+            batch.add(message, sample, next_index)
+            full = full or len(batch) >= max(1, settings.EXPERIMENT_WS_FRAME_BATCH_MAX_SAMPLES)
+
+        if full:
+            self._flush_sample_batch()
+        elif self.batch_flush_handle is None:
+            self.batch_flush_handle = asyncio.get_running_loop().call_later(
+                settings.EXPERIMENT_WS_FRAME_BATCH_WINDOW_MS / 1000,
+                self._on_batch_window_elapsed,
+            )
+
+    def _forward(self, message: str | bytes) -> None:
+        # anything that is not a sample flushes pending samples first to keep order
+        self._flush_sample_batch()
+        if isinstance(message, bytes):
+            self._send_bytes(message)
+        else:
+            self._send_text(message)
 
     async def _close_client(self, close_code: int, close_reason: str) -> None:
-        if self.client is not None:
-            with suppress(Exception):
-                await self.client.close(code=close_code, reason=close_reason)
-            self.client = None
+        # closes the owner and every spectator
+        self._flush_sample_batch()
+        subscribers, self.subscribers = self.subscribers, []
+        self.client = None
+        self.sample_batches = {}
+        await asyncio.gather(*[
+            subscriber.writer.close(close_code, close_reason, settings.EXPERIMENT_WS_CLIENT_CLOSE_TIMEOUT_SECONDS)
+            for subscriber in subscribers
+        ])
 
     async def enqueue_client_payload(self, raw_payload: str) -> None:
         if self.closed or self.runner_task is None or self.runner_task.done():
@@ -155,7 +371,7 @@ class _ReservationUpstreamSession:
 
         experiment_log_id: int | None = None
         if normalized_payload.command == Command.START:
-            remaining_seconds = _remaining_reservation_seconds(self.reservation_id)
+            remaining_seconds = await run_db(_remaining_reservation_seconds, self.reservation_id)
             if remaining_seconds is None or remaining_seconds <= 0:
                 raise ValueError("reservation expired")
 
@@ -165,7 +381,8 @@ class _ReservationUpstreamSession:
                     f"simulation_time {requested_simulation_seconds:g}s exceeds remaining reservation window {remaining_seconds:.1f}s"
                 )
 
-            experiment_log_id = _create_experiment_log_for_payload(
+            experiment_log_id = await run_db(
+                _create_experiment_log_for_payload,
                 normalized_payload,
                 self.user_id,
                 self.reservation_device_id,
@@ -181,82 +398,161 @@ class _ReservationUpstreamSession:
 
     async def _run_sender(self, upstream_ws) -> None:
         while not self.stop_event.is_set():
-            queued = await self.command_queue.get()
+            # a command whose send failed stays here and goes out first after a reconnect
+            if self.retry_command is None:
+                self.retry_command = await self.command_queue.get()
+            queued = self.retry_command
 
-            try:
-                await upstream_ws.send(queued.payload_json)
-                self.last_sent_command = queued.command
-            except Exception:
-                if queued.experiment_log_id is not None:
-                    _mark_experiment_log_as_error(queued.experiment_log_id)
-                raise
+            await upstream_ws.send(queued.payload_json)
+            self.retry_command = None
+            self.last_sent_command = queued.command
 
             if queued.command == Command.START and queued.experiment_log_id is not None:
                 self.pending_start_attempt_ids.push(queued.experiment_log_id)
 
     async def _run_receiver(self, upstream_ws) -> None:
-        async for message in upstream_ws:
-            if isinstance(message, bytes):
-                await self._send_bytes(message)
-                continue
+        # decode once, classify once, then dispatch to buffer / log sync / client
+        async for raw in upstream_ws:
+            started_at = time.perf_counter()
+            payload = decode_message(raw)
+            started_at = pipeline_stats.record("decode", started_at)
+            message = classify_message(raw, payload)
+            pipeline_stats.record("classify", started_at)
+            pipeline_stats.count(message.kind)
+            await self._dispatch(message)
+
+    async def _dispatch(self, message: UpstreamMessage) -> None:
+        if message.kind == MessageKind.ERROR:
+            if self.last_sent_command == Command.START:
+                rejected_log_id = self.pending_start_attempt_ids.pop()
+                if rejected_log_id is not None:
+                    await run_db(_delete_experiment_log, rejected_log_id)
+        elif message.has_run_signal:
+            accepted_log_id = self.pending_start_attempt_ids.pop()
+            if accepted_log_id is not None:
+                self.pending_log_ids.push(accepted_log_id)
+
+        if message.kind == MessageKind.SAMPLE and message.payload is not None:
+            started_at = time.perf_counter()
+            next_index = _append_stream_sample(self.reservation_id, message.payload)
+            started_at = pipeline_stats.record("buffer", started_at)
+            self._forward_sample(message.raw, message.payload, next_index)  # type: ignore[arg-type]
+            pipeline_stats.record("forward", started_at)
+            return
 
-            try:
-                payload = json.loads(message)
-            except JSONDecodeError:
-                payload = None
-
-            if isinstance(payload, dict):
-                if "error" in payload:
-                    if self.last_sent_command == Command.START:
-                        rejected_log_id = self.pending_start_attempt_ids.pop()
-                        if rejected_log_id is not None:
-                            _delete_experiment_log(rejected_log_id)
-
-                    await self._send_text(message)
-                    continue
-
-                has_run_signal = (
-                    "time" in payload
-                    or "run" in payload
-                    or "runs" in payload
-                    or "finished_at" in payload
-                    or "finish_reason" in payload
-                )
-                if has_run_signal:
-                    accepted_log_id = self.pending_start_attempt_ids.pop()
-                    if accepted_log_id is not None:
-                        self.pending_log_ids.push(accepted_log_id)
+        if message.kind == MessageKind.TERMINAL and message.payload is not None:
+            started_at = time.perf_counter()
+            await run_db(_sync_next_log_with_terminal_payload, self.pending_log_ids, message.payload)
+            pipeline_stats.record("log_sync", started_at)
 
-                partial_sample = _extract_partial_stream_sample(payload)
-                if partial_sample is not None:
-                    _append_stream_sample(self.reservation_id, partial_sample)
+        started_at = time.perf_counter()
+        self._forward(message.raw)
+        pipeline_stats.record("forward", started_at)
 
-            _sync_log_from_upstream_message(self.pending_log_ids, message)
-            await self._send_text(message)
+        if message.kind in (MessageKind.ERROR, MessageKind.TERMINAL):
+            # a handoff deferred for a running experiment can go ahead once it is synced
+            self.hand_off_if_requested()
 
-    async def _run_reservation_watch(self, upstream_ws) -> None:
+    async def _run_reservation_watch(self) -> None:
+        # the end time is read once and re-read only when the timer fires or
+        # the reservation is edited/deleted
+        changed = asyncio.Event()
+        unsubscribe = subscribe_reservation(self.reservation_id, lambda _: changed.set())
+        try:
+            await self._watch_reservation(changed)
+        finally:
+            unsubscribe()
+
+    async def _watch_reservation(self, changed: asyncio.Event) -> None:
         while not self.stop_event.is_set():
-            reservation_active, reservation_reason = _reservation_state(self.reservation_id)
+            changed.clear()
+            reservation_active, reservation_reason, remaining = await run_db(_reservation_state, self.reservation_id)
             if not reservation_active:
-                self.stop_event.set()
-
-                with suppress(Exception):
-                    await upstream_ws.close(code=status.WS_1000_NORMAL_CLOSURE, reason=reservation_reason)
-
-                await self._send_text(reservation_reason)
+                await self.shutdown(reservation_reason)
+                self._send_text(reservation_reason)
                 await self._close_client(
                     close_code=status.WS_1008_POLICY_VIOLATION,
                     close_reason=reservation_reason,
                 )
                 return
 
-            await asyncio.sleep(1)
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(changed.wait(), timeout=remaining)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        ceiling = min(
+            settings.EXPERIMENT_WS_UPSTREAM_BACKOFF_MAX_SECONDS,
+            settings.EXPERIMENT_WS_UPSTREAM_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1),
+        )
+        # equal jitter: never retry immediately, never synchronize with other sessions
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    async def _run_connection(self, upstream_ws) -> None:
+        sender_task = asyncio.create_task(self._run_sender(upstream_ws))
+        receiver_task = asyncio.create_task(self._run_receiver(upstream_ws))
+
+        done, pending = await asyncio.wait({sender_task, receiver_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        for pending_task in pending:
+            pending_task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for completed_task in done:
+            completed_task.result()
+
+    async def _run_upstream(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with connect(
+                    self.api_url,
+                    additional_headers={"x-api-key": settings.EXPERIMENTAL_API_KEY},
+                ) as upstream_ws:
+                    self.upstream_ws = upstream_ws
+                    if self.down_since is not None:
+                        self._mark_reconnected()
+                    attempt = 0
+                    await self._run_connection(upstream_ws)
+            except (ConnectionClosed, OSError, InvalidHandshake, asyncio.TimeoutError) as e:
+                if self.stop_event.is_set():
+                    return
+                logger.warning("Device server connection lost reservation_id=%s: %s", self.reservation_id, e)
+            finally:
+                self.upstream_ws = None
+
+            if self.stop_event.is_set():
+                return
+
+            attempt += 1
+            if attempt > settings.EXPERIMENT_WS_UPSTREAM_RECONNECT_ATTEMPTS:
+                _upstream_stats["failed_sessions"] += 1
+                raise ConnectionError("device server reconnect attempts exhausted")
+
+            if self.down_since is None:
+                self.down_since = time.monotonic()
+                _upstream_stats["drops"] += 1
+                self._send_text("Device server connection lost, reconnecting")
+
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.stop_event.wait(), timeout=self._backoff_delay(attempt))
+            if self.stop_event.is_set():
+                return
+
+    def _mark_reconnected(self) -> None:
+        downtime = time.monotonic() - (self.down_since or time.monotonic())
+        self.down_since = None
+        self.reconnects += 1
+        self.downtime_seconds += downtime
+        _upstream_stats["reconnects"] += 1
+        _upstream_stats["downtime_seconds"] += downtime
+        logger.info("Device server reconnected reservation_id=%s downtime=%.2fs", self.reservation_id, downtime)
+        self._send_text("Device server reconnected")
 
     async def _run(self) -> None:
         try:
-            reservation_active, reservation_reason = _reservation_state(self.reservation_id)
+            reservation_active, reservation_reason, _ = await run_db(_reservation_state, self.reservation_id)
             if not reservation_active:
-                await self._send_text(reservation_reason)
+                self._send_text(reservation_reason)
                 await self._close_client(
                     close_code=status.WS_1008_POLICY_VIOLATION,
                     close_reason=reservation_reason,
@@ -264,28 +560,23 @@ class _ReservationUpstreamSession:
                 return
 
             try:
-                async with connect(
-                    self.api_url,
-                    additional_headers={"x-api-key": settings.EXPERIMENTAL_API_KEY},
-                ) as upstream_ws:
-                    sender_task = asyncio.create_task(self._run_sender(upstream_ws))
-                    receiver_task = asyncio.create_task(self._run_receiver(upstream_ws))
-                    reservation_watch_task = asyncio.create_task(self._run_reservation_watch(upstream_ws))
+                upstream_task = asyncio.create_task(self._run_upstream())
+                reservation_watch_task = asyncio.create_task(self._run_reservation_watch())
 
-                    done, pending = await asyncio.wait(
-                        {sender_task, receiver_task, reservation_watch_task},
-                        return_when=asyncio.FIRST_COMPLETED,
-                    )
+                done, pending = await asyncio.wait(
+                    {upstream_task, reservation_watch_task},
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
 
-                    for pending_task in pending:
-                        pending_task.cancel()
-                    await asyncio.gather(*pending, return_exceptions=True)
+                for pending_task in pending:
+                    pending_task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
 
-                    for completed_task in done:
-                        completed_task.result()
+                for completed_task in done:
+                    completed_task.result()
             except WebSocketDisconnect:
                 pass
-            except ConnectionClosed as e:
+            except ConnectionError as e:
                 logger.warning("Device server connection lost: %s", e)
                 await self._close_client(
                     close_code=status.WS_1011_INTERNAL_ERROR,
@@ -299,6 +590,20 @@ class _ReservationUpstreamSession:
                 )
         finally:
             self.closed = True
+            self.upstream_ws = None
+            _drop_stream_buffer(self.reservation_id)
+            _remove_reservation_session(self.reservation_id, expected=self)
+            if self.subscribers:
+                # a handoff or upstream stop leaves spectators attached to a
+                # session that will never send again
+                await self._close_client(
+                    close_code=status.WS_1013_TRY_AGAIN_LATER,
+                    close_reason="reservation session ended",
+                )
+            await session_registry.release(self.reservation_id)
+
+            if self.retry_command is not None and self.retry_command.experiment_log_id is not None:
+                await run_db(_mark_experiment_log_as_error, self.retry_command.experiment_log_id)
 
             while not self.command_queue.empty():
                 try:
@@ -306,16 +611,13 @@ class _ReservationUpstreamSession:
                 except asyncio.QueueEmpty:
                     break
                 if queued.experiment_log_id is not None:
-                    _mark_experiment_log_as_error(queued.experiment_log_id)
+                    await run_db(_mark_experiment_log_as_error, queued.experiment_log_id)
 
             for pending_log_id in self.pending_start_attempt_ids.drain():
-                _mark_experiment_log_as_error(pending_log_id)
+                await run_db(_mark_experiment_log_as_error, pending_log_id)
 
             for pending_log_id in self.pending_log_ids.drain():
-                _mark_experiment_log_as_error(pending_log_id)
-
-            _clear_stream_buffer(self.reservation_id)
-            _remove_reservation_session(self.reservation_id, expected=self)
+                await run_db(_mark_experiment_log_as_error, pending_log_id)
 
 
 def _remove_reservation_session(
@@ -333,21 +635,94 @@ def _remove_reservation_session(
         _reservation_sessions.pop(reservation_id, None)
 
 
-def _get_or_create_reservation_session(ctx: _ReservationContext) -> _ReservationUpstreamSession:
-    # double-checked locking — create once per reservation_id
+def _live_reservation_session(reservation_id: int) -> _ReservationUpstreamSession | None:
     with _reservation_sessions_lock:
-        existing = _reservation_sessions.get(ctx.reservation_id)
-        if existing is not None and not existing.closed:
-            return existing
+        existing = _reservation_sessions.get(reservation_id)
+    if existing is not None and not existing.closed:
+        return existing
+    return None
+
+
+async def _claim_reservation(reservation_id: int) -> bool:
+    if await session_registry.acquire(reservation_id):
+        return True
+
+    # another worker owns the upstream connection; ask it to let go if it is idle
+    await session_registry.request_handoff(reservation_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.WS_SESSION_HANDOFF_TIMEOUT_SECONDS
+    while loop.time() < deadline:
+        await asyncio.sleep(0.2)
+        if await session_registry.acquire(reservation_id):
+            return True
+    return False
+
+
+async def _get_or_create_reservation_session(ctx: _ReservationContext) -> _ReservationUpstreamSession | None:
+    existing = _live_reservation_session(ctx.reservation_id)
+    if existing is not None:
+        return existing
+
+    if not await _claim_reservation(ctx.reservation_id):
+        return None
 
     new_session = _ReservationUpstreamSession(ctx)
 
+    # double-checked — another connection may have created it while we claimed
     with _reservation_sessions_lock:
         existing = _reservation_sessions.get(ctx.reservation_id)
-        if existing is not None and not existing.closed:
-            return existing
+        if existing is None or existing.closed:
+            _reservation_sessions[ctx.reservation_id] = new_session
+            existing = None
 
-        _reservation_sessions[ctx.reservation_id] = new_session
+    if existing is not None:
+        await session_registry.release(ctx.reservation_id)
+        return existing
 
     new_session.start()
     return new_session
+
+
+def _on_handoff_requested(reservation_id: int) -> None:
+    session = _live_reservation_session(reservation_id)
+    if session is None or session.client is not None:
+        return
+
+    # a session with a run in flight keeps the lock until that run's log is
+    # synced, shutting it down now would mark the running experiment as failed
+    session.handoff_requested = True
+    if session.has_run_in_flight:
+        logger.info("Deferring reservation session handoff reservation_id=%s reason=run_in_flight", reservation_id)
+    session.hand_off_if_requested()
+
+
+register_channel(HANDOFF_CHANNEL, _on_handoff_requested)
+
+
+def _client_queue_stats(subscribers: list[_Subscriber]) -> dict:
+    writers = [subscriber.writer for subscriber in subscribers]
+    return {
+        "client_queue_depth": max((writer.depth for writer in writers), default=0),
+        "client_queue_max_depth": max((writer.max_depth for writer in writers), default=0),
+        "client_dropped": sum(writer.dropped for writer in writers),
+        "client_coalesced": sum(writer.coalesced for writer in writers),
+    }
+
+
+def upstream_stats_snapshot() -> dict:
+    with _reservation_sessions_lock:
+        sessions = list(_reservation_sessions.values())
+
+    return {
+        **_upstream_stats,
+        "sessions": {
+            session.reservation_id: {
+                "connected": session.upstream_ws is not None,
+                "reconnects": session.reconnects,
+                "downtime_seconds": round(session.downtime_seconds, 3),
+                "spectators": sum(1 for subscriber in session.subscribers if not subscriber.owner),
+                **_client_queue_stats(session.subscribers),
+            }
+            for session in sessions
+        },
+    }
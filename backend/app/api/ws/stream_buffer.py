@@ -1,54 +1,203 @@
+from array import array
 from threading import Lock
 from typing import Any
 
 from app.core.config import settings
 
 
-_stream_buffer_lock = Lock()
-_stream_buffers: dict[int, list[dict[str, Any]]] = {}
+_MISSING = object()
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _StreamRing:
+    # fixed-capacity ring; samples are addressed by a sequence number that
+    # keeps growing, so cursors stay valid across eviction.
+    # numeric channels seen in the first sample live in typed arrays, anything
+    # that does not fit them goes to a per-slot overrides dict
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self._columns: dict[str, array] | None = None
+        self._overrides: list[dict[str, Any] | None] = []
+        self.first_seq = 0
+        self.next_seq = 0
+        # held for an append or a slice copy, never while dicts are built
+        self.lock = Lock()
+
+    @staticmethod
+    def _fits(column: array, value: Any) -> bool:
+        if isinstance(value, float):
+            return True
+        if not _is_number(value):
+            return False
+        if column.typecode == "q":
+            return -2**63 <= value < 2**63
+        return float(value) == value
+
+    def _discover_columns(self, sample: dict[str, Any]) -> dict[str, array]:
+        return {
+            name: array("d" if isinstance(value, float) else "q")
+            for name, value in sample.items()
+            if self._fits(array("q"), value)
+        }
+
+    def _store(self, name: str, column: array, slot: int, value: Any) -> array:
+        if column.typecode == "q" and isinstance(value, float):
+            column = self._columns[name] = array("d", column)  # type: ignore[index]
+        if slot == len(column):
+            column.append(value)
+        else:
+            column[slot] = value
+        return column
+
+    def append(self, sample: dict[str, Any]) -> int:
+        with self.lock:
+            if self._columns is None:
+                self._columns = self._discover_columns(sample)
+
+            slot = self.next_seq % self.capacity
+            overrides: dict[str, Any] | None = None
+            for name, column in self._columns.items():
+                value = sample.get(name, _MISSING)
+                if not self._fits(column, value):
+                    overrides = overrides or {}
+                    overrides[name] = value
+                    value = 0
+                self._store(name, column, slot, value)
+
+            for name, value in sample.items():
+                if name not in self._columns:
+                    overrides = overrides or {}
+                    overrides[name] = value
+
+            if slot == len(self._overrides):
+                self._overrides.append(overrides)
+            else:
+                self._overrides[slot] = overrides
+
+            self.next_seq += 1
+            if self.next_seq - self.first_seq > self.capacity:
+                self.first_seq = self.next_seq - self.capacity
+            return self.next_seq
+
+    def snapshot(self, after_seq: int) -> "_RingSnapshot":
+        # only the slot ranges are copied under the lock (array slices are a
+        # memcpy), the dicts are built by the caller without holding it
+        with self.lock:
+            start = min(max(after_seq, self.first_seq), self.next_seq)
+            dropped = max(0, min(self.first_seq, self.next_seq) - max(after_seq, 0))
+            columns = self._columns or {}
+            segments: list[tuple[list[array], list[dict[str, Any] | None]]] = []
+            # at most two contiguous slot ranges, split where the ring wraps
+            seq = start
+            while seq < self.next_seq:
+                slot = seq % self.capacity
+                stop = min(self.capacity, slot + self.next_seq - seq)
+                segments.append(([column[slot:stop] for column in columns.values()], self._overrides[slot:stop]))
+                seq += stop - slot
+            return _RingSnapshot(list(columns), segments, self.next_seq, self.first_seq, dropped)
+
+    def read(self, after_seq: int) -> tuple[list[dict[str, Any]], int, int, int]:
+        return self.snapshot(after_seq).unpack()
+
+
+class _RingSnapshot:
+    # override dicts are replaced, never mutated, on slot reuse, so sharing
+    # them with a snapshot is safe
+    def __init__(
+        self,
+        names: list[str],
+        segments: list[tuple[list[array], list[dict[str, Any] | None]]],
+        next_seq: int,
+        first_seq: int,
+        dropped: int,
+    ) -> None:
+        self.names = names
+        self.segments = segments
+        self.next_seq = next_seq
+        self.first_seq = first_seq
+        self.dropped = dropped
+
+    def __len__(self) -> int:
+        return sum(len(overrides) for _, overrides in self.segments)
+
+    @staticmethod
+    def _segment(names: list[str], columns: list[array], overrides: list[dict[str, Any] | None]) -> list[dict[str, Any]]:
+        samples = [dict(zip(names, row)) for row in zip(*columns)]
+        if not names:
+            samples = [{} for _ in overrides]
+
+        for offset, sample_overrides in enumerate(overrides):
+            if not sample_overrides:
+                continue
+            sample = samples[offset]
+            for name, value in sample_overrides.items():
+                if value is _MISSING:
+                    sample.pop(name, None)
+                else:
+                    sample[name] = value
+        return samples
+
+    def samples(self) -> list[dict[str, Any]]:
+        samples: list[dict[str, Any]] = []
+        for columns, overrides in self.segments:
+            samples.extend(self._segment(self.names, columns, overrides))
+        return samples
+
+    def unpack(self) -> tuple[list[dict[str, Any]], int, int, int]:
+        return self.samples(), self.next_seq, self.first_seq, self.dropped
+
+
+# the registry lock guards create/replace/drop only; appends and reads
+# look the ring up without it and serialize on the ring's own lock
+_stream_buffers_lock = Lock()
+_stream_buffers: dict[int, _StreamRing] = {}
+
+
+def _new_stream_ring() -> _StreamRing:
+    return _StreamRing(settings.EXPERIMENT_WS_BUFFER_MAX_SAMPLES)
+
+
+def _get_or_create_stream_buffer(reservation_id: int) -> _StreamRing:
+    ring = _stream_buffers.get(reservation_id)
+    if ring is not None:
+        return ring
+
+    with _stream_buffers_lock:
+        ring = _stream_buffers.get(reservation_id)
+        if ring is None:
+            ring = _stream_buffers[reservation_id] = _new_stream_ring()
+        return ring
 
 
 def _clear_stream_buffer(reservation_id: int) -> None:
-    with _stream_buffer_lock:
-        _stream_buffers[reservation_id] = []
+    with _stream_buffers_lock:
+        _stream_buffers[reservation_id] = _new_stream_ring()
 
 
-def _append_stream_sample(reservation_id: int, sample: dict[str, Any]) -> None:
-    with _stream_buffer_lock:
-        entries = _stream_buffers.setdefault(reservation_id, [])
-        entries.append(sample)
+def _drop_stream_buffer(reservation_id: int) -> None:
+    with _stream_buffers_lock:
+        _stream_buffers.pop(reservation_id, None)
 
-        max_samples = max(1, settings.EXPERIMENT_WS_BUFFER_MAX_SAMPLES)
-        overflow = len(entries) - max_samples
-        if overflow > 0:
-            del entries[:overflow]
 
-
-def _read_stream_samples(
-    reservation_id: int,
-    after_index: int,
-) -> tuple[list[dict[str, Any]], int, int]:
-    with _stream_buffer_lock:
-        entries = _stream_buffers.get(reservation_id, [])
-        total = len(entries)
-        safe_after_index = min(max(after_index, 0), total)
-        samples = entries[safe_after_index:]
-        next_index = total
-
-    return samples, next_index, total
+def _append_stream_sample(reservation_id: int, sample: dict[str, Any]) -> int:
+    # returns the cursor just past the appended sample
+    return _get_or_create_stream_buffer(reservation_id).append(sample)
 
 
-def _extract_partial_stream_sample(payload: dict[str, Any]) -> dict[str, Any] | None:
-    if "error" in payload:
-        return None
+def _snapshot_stream_samples(reservation_id: int, after_index: int) -> _RingSnapshot:
+    ring = _stream_buffers.get(reservation_id)
+    if ring is None:
+        return _RingSnapshot([], [], 0, 0, 0)
+    return ring.snapshot(after_index)
 
-    if "run" in payload or "runs" in payload:
-        return None
 
-    if "finished_at" in payload or "finish_reason" in payload:
-        return None
-
-    if "time" not in payload:
-        return None
+def _read_stream_samples(
+    reservation_id: int,
+    after_index: int,
+) -> tuple[list[dict[str, Any]], int, int, int]:
+    # dropped counts samples after the cursor that were already evicted
+    return _snapshot_stream_samples(reservation_id, after_index).unpack()
 
-    return payload
@@ -1,4 +1,5 @@
 from datetime import time
+from typing import Literal
 
 from pydantic import computed_field
 from pydantic_core import MultiHostUrl
@@ -23,24 +24,67 @@ class Settings(BaseSettings):
 
     AUTH_SERVICE_URL: str = "http://host.docker.internal:8080/internal/api"
     AUTH_API_KEY: str = "devapikey"
+    AUTH_HTTP_MAX_CONNECTIONS: int = 100
+    AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    AUTH_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    AUTH_HTTP2: bool = False
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_PERMISSION_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_PERMISSION_CACHE_MAX_ENTRIES: int = 50000
+    AUTH_USERNAME_CACHE_TTL_SECONDS: float = 300.0
+    AUTH_USERNAME_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USERNAME_MAX_CONCURRENCY: int = 10
+    AUTH_USERS_BATCH_PATH: str = "/users/batch"
+    AUTH_USERS_BATCH_SIZE: int = 200
     EXPERIMENTAL_API_KEY: str = "experimentalapikey"
     EXPERIMENTAL_HEALTH_PATH: str = "/api/server/sync"
     SERVER_SYNC_WORKER_ENABLED: bool = True
     SERVER_SYNC_WORKER_TIME: time = time(4, 0)
     EXPERIMENT_QUEUE_WORKER_ENABLED: bool = True
     EXPERIMENT_QUEUE_WORKER_INTERVAL_SECONDS: int = 5
+    # the submit worker sleeps until woken or the next entry is due, at most this long
+    EXPERIMENT_QUEUE_WORKER_MAX_IDLE_SECONDS: int = 60
+    EXPERIMENT_QUEUE_PG_NOTIFY: bool = False
     EXPERIMENT_QUEUE_REQUEST_TIMEOUT_SECONDS: float = 10.0
     EXPERIMENT_QUEUE_BATCH_SIZE: int = 20
+    EXPERIMENT_QUEUE_SUBMIT_CONCURRENCY: int = 8
+    EXPERIMENT_QUEUE_SUBMIT_PER_SERVER_CONCURRENCY: int = 2
+    EXPERIMENT_QUEUE_LEASE_SECONDS: int = 120
     EXPERIMENT_QUEUE_RETRY_BASE_SECONDS: int = 30
     EXPERIMENT_QUEUE_RETRY_MAX_SECONDS: int = 600
     EXPERIMENT_QUEUE_MAX_SUBMIT_ATTEMPTS: int = 3
     EXPERIMENT_QUEUE_POLL_RATE_PER_SECOND: int = 1
     EXPERIMENT_QUEUE_MAX_POLL_ATTEMPTS: int = 1000
+    EXPERIMENT_QUEUE_POLL_FIRST_GRACE_SECONDS: float = 2.0
+    EXPERIMENT_QUEUE_POLL_BASE_SECONDS: float = 2.0
+    EXPERIMENT_QUEUE_POLL_BACKOFF_FACTOR: float = 1.5
+    EXPERIMENT_QUEUE_POLL_MAX_SECONDS: float = 60.0
+    EXPERIMENT_QUEUE_POLL_GIVE_UP_GRACE_SECONDS: float = 600.0
     EXPERIMENT_QUEUE_SUBMIT_PATH: str = "/api/server/experiments/queue"
     EXPERIMENT_QUEUE_STATUS_PATH: str = "/api/server/experiments/{job_id}"
     EXPERIMENT_WS_PATH: str = "/ws/server/experiments"
-    EXPERIMENT_WS_BUFFER_MAX_SAMPLES: int = 20000
+    EXPERIMENT_WS_BUFFER_MAX_SAMPLES: int = 200000
+    EXPERIMENT_WS_REPLAY_BATCH_SIZE: int = 1000
+    EXPERIMENT_WS_FRAME_BATCH_WINDOW_MS: float = 16.0
+    EXPERIMENT_WS_FRAME_BATCH_MAX_SAMPLES: int = 256
+    EXPERIMENT_WS_DB_MAX_WORKERS: int = 8
+    EXPERIMENT_WS_CLIENT_QUEUE_MAX_FRAMES: int = 512
+    EXPERIMENT_WS_CLIENT_OVERFLOW_POLICY: Literal["drop_oldest", "coalesce", "disconnect"] = "coalesce"
+    EXPERIMENT_WS_CLIENT_CLOSE_TIMEOUT_SECONDS: float = 2.0
+    EXPERIMENT_WS_MAX_SPECTATORS: int = 50
+    EXPERIMENT_WS_UPSTREAM_RECONNECT_ATTEMPTS: int = 8
+    EXPERIMENT_WS_UPSTREAM_BACKOFF_BASE_SECONDS: float = 0.5
+    EXPERIMENT_WS_UPSTREAM_BACKOFF_MAX_SECONDS: float = 10.0
+    WS_SESSION_REGISTRY: Literal["local", "postgres"] = "local"
+    WS_SESSION_HANDOFF_TIMEOUT_SECONDS: float = 5.0
     RESERVATION_MAX_MINUTES: int = 30
+    RESERVATION_EVENTS_PG_NOTIFY: bool = False
+    EXPERIMENT_LOG_PAGE_DEFAULT_SIZE: int = 100
+    EXPERIMENT_LOG_PAGE_MAX_SIZE: int = 500
+    EXPERIMENT_LOG_DOWNSAMPLE_MAX_WIDTH: int = 10000
+    EXPERIMENT_LOG_DOWNSAMPLE_CACHE_TTL_SECONDS: float = 600.0
+    EXPERIMENT_LOG_DOWNSAMPLE_CACHE_MAX_ENTRIES: int = 512
 
     @computed_field
     @property
@@ -7,6 +7,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.api.api import api_router
+from app.api.dependencies import close_auth_client, open_auth_client
+from app.api.reservation_events import run_reservation_listener
+from app.api.ws.db import shutdown_db_executor
 from app.api.workers.queue import run_poll_worker, run_submit_worker
 from app.api.workers.sync import run_sync_worker
 from app.core.config import settings
@@ -18,6 +21,7 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     stop_event = asyncio.Event()
     tasks: list[asyncio.Task] = []
+    await open_auth_client()
 
     if settings.EXPERIMENT_QUEUE_WORKER_ENABLED:
         tasks += [
@@ -27,6 +31,13 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Experiment queue worker disabled")
 
+    if (
+        settings.RESERVATION_EVENTS_PG_NOTIFY
+        or settings.EXPERIMENT_QUEUE_PG_NOTIFY
+        or settings.WS_SESSION_REGISTRY == "postgres"
+    ):
+        tasks.append(asyncio.create_task(run_reservation_listener(stop_event)))
+
     if settings.SERVER_SYNC_WORKER_ENABLED:
         tasks.append(asyncio.create_task(run_sync_worker(stop_event)))
     else:
@@ -37,6 +48,8 @@ async def lifespan(app: FastAPI):
     stop_event.set()
     if tasks:
         await asyncio.gather(*tasks)
+    await close_auth_client()
+    shutdown_db_executor()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -47,6 +60,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_router)
@@ -0,0 +1,47 @@
+"""add_experiment_log_indexes
+
+Revision ID: 12_add_exp_log_indexes
+Revises: 11_seed_test_data
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "12_add_exp_log_indexes"
+down_revision: Union[str, Sequence[str], None] = "11_seed_test_data"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# equality prefix per listing filter; the keyset tail matches the listing's
+# ORDER BY started_at DESC NULLS LAST, id DESC exactly
+INDEXES = {
+    "ix_experiment_log_started_at_id": [],
+    "ix_experiment_log_user_id_started_at_id": ["user_id"],
+    "ix_experiment_log_device_id_started_at_id": ["device_id"],
+    "ix_experiment_log_server_id_started_at_id": ["server_id"],
+    "ix_experiment_log_experiment_id_started_at_id": ["experiment_id"],
+    "ix_experiment_log_finish_reason_started_at_id": ["finish_reason"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, prefix in INDEXES.items():
+        op.create_index(
+            name,
+            "experiment_log",
+            [*prefix, sa.text("started_at DESC NULLS LAST"), sa.text("id DESC")],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name="experiment_log")
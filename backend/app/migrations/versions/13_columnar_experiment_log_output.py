@@ -0,0 +1,199 @@
+"""columnar_experiment_log_output
+
+Revision ID: 13_exp_log_output
+Revises: 12_add_exp_log_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "13_exp_log_output"
+down_revision: Union[str, Sequence[str], None] = "12_add_exp_log_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 200
+
+
+# frozen copy of the version 1 output_history codec; the migration must keep
+# writing and reading this format whatever app.models.experiment_log becomes
+_TYPECODES = {"i8": "q", "f8": "d"}
+_MISSING = object()
+
+
+def _numeric_kind(values: list[Any]) -> str | None:
+    kind = "i8"
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        if isinstance(value, float):
+            kind = "f8"
+        elif not -2**63 <= value < 2**63:
+            return None
+    if kind == "f8" and any(isinstance(value, int) and float(value) != value for value in values):
+        return None
+    return kind
+
+
+def _channels(samples: list[dict[str, Any]]) -> list[str]:
+    names: dict[str, None] = {}
+    for sample in samples:
+        names.update(dict.fromkeys(sample))
+    return list(names)
+
+
+def _encode_v1(samples: list[dict[str, Any]]) -> bytes:
+    columns: list[dict[str, Any]] = []
+    buffers: list[bytes] = []
+    for name in _channels(samples):
+        values = [sample.get(name, _MISSING) for sample in samples]
+        kind = _numeric_kind(values)
+        if kind is None:
+            columns.append({
+                "name": name,
+                "type": "json",
+                "values": [None if value is _MISSING else value for value in values],
+                "missing": [index for index, value in enumerate(values) if value is _MISSING],
+            })
+            continue
+
+        column = array(_TYPECODES[kind], values)
+        if sys.byteorder != "little":
+            column.byteswap()
+        buffers.append(column.tobytes())
+        spec: dict[str, Any] = {"name": name, "type": kind}
+        ints = [index for index, value in enumerate(values) if kind == "f8" and isinstance(value, int)]
+        if ints:
+            spec["ints"] = ints
+        columns.append(spec)
+
+    header = json.dumps({"version": 1, "length": len(samples), "columns": columns}, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(struct.pack("<I", len(header)) + header + b"".join(buffers))
+
+
+def _decode_v1(data: bytes) -> list[dict[str, Any]]:
+    raw = memoryview(zlib.decompress(data))
+    (header_length,) = struct.unpack_from("<I", raw)
+    header = json.loads(bytes(raw[4:4 + header_length]))
+    length = header["length"]
+    offset = 4 + header_length
+
+    samples: list[dict[str, Any]] = [{} for _ in range(length)]
+    for spec in header["columns"]:
+        name = spec["name"]
+        if spec["type"] == "json":
+            missing = set(spec["missing"])
+            for index, value in enumerate(spec["values"]):
+                if index not in missing:
+                    samples[index][name] = value
+            continue
+
+        column = array(_TYPECODES[spec["type"]])
+        size = length * column.itemsize
+        column.frombytes(raw[offset:offset + size])
+        if sys.byteorder != "little":
+            column.byteswap()
+        offset += size
+        ints = set(spec.get("ints", ()))
+        for index, value in enumerate(column):
+            samples[index][name] = int(value) if index in ints else value
+    return samples
+
+
+def _numeric_time(sample: dict[str, Any]) -> float | None:
+    value = sample.get("time")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _output_row(log_id: int, samples: list[dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "experiment_log_id": log_id,
+        "sample_count": len(samples),
+        "time_start": _numeric_time(samples[0]) if samples else None,
+        "time_end": _numeric_time(samples[-1]) if samples else None,
+        "channels": json.dumps(_channels(samples)),
+        "data": _encode_v1(samples),
+    }
+
+
+def _batches(bind, query: str):
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(query), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "experiment_log_output",
+        sa.Column("experiment_log_id", sa.Integer(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("time_start", sa.Float(), nullable=True),
+        sa.Column("time_end", sa.Float(), nullable=True),
+        sa.Column("channels", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["experiment_log_id"], ["experiment_log.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("experiment_log_id"),
+    )
+
+    bind = op.get_bind()
+    query = """
+        SELECT id, run->'output_history' FROM experiment_log
+        WHERE id > :last_id AND jsonb_typeof(run->'output_history') = 'array'
+        ORDER BY id LIMIT :limit
+    """
+    for rows in _batches(bind, query):
+        outputs = [
+            _output_row(log_id, samples)
+            for log_id, samples in rows
+            if all(isinstance(sample, dict) for sample in samples)
+        ]
+
+        if not outputs:
+            continue
+        bind.execute(
+            sa.text("""
+                INSERT INTO experiment_log_output (experiment_log_id, sample_count, time_start, time_end, channels, data)
+                VALUES (:experiment_log_id, :sample_count, :time_start, :time_end, CAST(:channels AS jsonb), :data)
+            """),
+            outputs,
+        )
+        bind.execute(
+            sa.text("UPDATE experiment_log SET run = jsonb_set(run, '{output_history}', '[]'::jsonb) WHERE id = ANY(:ids)"),
+            {"ids": [output["experiment_log_id"] for output in outputs]},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    query = """
+        SELECT experiment_log_id, data FROM experiment_log_output
+        WHERE experiment_log_id > :last_id
+        ORDER BY experiment_log_id LIMIT :limit
+    """
+    for rows in _batches(bind, query):
+        bind.execute(
+            sa.text("UPDATE experiment_log SET run = jsonb_set(run, '{output_history}', CAST(:samples AS jsonb)) WHERE id = :id"),
+            [{"id": log_id, "samples": json.dumps(_decode_v1(data))} for log_id, data in rows],
+        )
+
+    op.drop_table("experiment_log_output")
@@ -0,0 +1,37 @@
+"""experiment_queue_leases
+
+Revision ID: 14_exp_queue_leases
+Revises: 13_exp_log_output
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "14_exp_queue_leases"
+down_revision: Union[str, Sequence[str], None] = "13_exp_log_output"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("experiment_queue", sa.Column("claimed_by", sa.String(), nullable=True))
+    op.add_column("experiment_queue", sa.Column("lease_until", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_experiment_queue_status_created_at",
+        "experiment_queue",
+        ["status", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_experiment_queue_status_created_at", table_name="experiment_queue")
+    op.drop_column("experiment_queue", "lease_until")
+    op.drop_column("experiment_queue", "claimed_by")
@@ -0,0 +1,42 @@
+"""experiment_queue_poll_schedule
+
+Revision ID: 15_exp_queue_poll_schedule
+Revises: 14_exp_queue_leases
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "15_exp_queue_poll_schedule"
+down_revision: Union[str, Sequence[str], None] = "14_exp_queue_leases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "experiment_queue",
+        sa.Column("poll_attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("experiment_queue", sa.Column("next_poll_at", sa.DateTime(), nullable=True))
+    op.add_column("experiment_queue", sa.Column("poll_deadline_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_experiment_queue_status_next_poll_at",
+        "experiment_queue",
+        ["status", "next_poll_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_experiment_queue_status_next_poll_at", table_name="experiment_queue")
+    op.drop_column("experiment_queue", "poll_deadline_at")
+    op.drop_column("experiment_queue", "next_poll_at")
+    op.drop_column("experiment_queue", "poll_attempts")
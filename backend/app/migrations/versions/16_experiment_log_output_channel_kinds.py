@@ -0,0 +1,94 @@
+"""experiment_log_output_channel_kinds
+
+Revision ID: 16_exp_log_output_kinds
+Revises: 15_exp_queue_poll_schedule
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import json
+import struct
+import zlib
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "16_exp_log_output_kinds"
+down_revision: Union[str, Sequence[str], None] = "15_exp_queue_poll_schedule"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 200
+
+
+# frozen copy of the version 1 header reader and channel kind rules
+def _decode_v1_header(data: bytes) -> dict[str, Any]:
+    inflater = zlib.decompressobj()
+    (header_length,) = struct.unpack("<I", inflater.decompress(data, 4))
+    return json.loads(inflater.decompress(inflater.unconsumed_tail, header_length))
+
+
+def _channel_kind(values) -> str | None:
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "json"
+        if isinstance(value, float):
+            kind = "f8"
+        elif kind is None:
+            kind = "i8"
+    return kind
+
+
+def _channel_kinds(data: bytes) -> dict[str, str | None]:
+    kinds: dict[str, str | None] = {}
+    for spec in _decode_v1_header(data)["columns"]:
+        if spec["type"] != "json":
+            kinds[spec["name"]] = spec["type"]
+            continue
+        missing = set(spec["missing"])
+        kinds[spec["name"]] = _channel_kind(value for index, value in enumerate(spec["values"]) if index not in missing)
+    return kinds
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "experiment_log_output",
+        sa.Column(
+            "channel_kinds",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("""
+                SELECT experiment_log_id, data FROM experiment_log_output
+                WHERE experiment_log_id > :last_id
+                ORDER BY experiment_log_id LIMIT :limit
+            """),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            sa.text("UPDATE experiment_log_output SET channel_kinds = CAST(:kinds AS jsonb) WHERE experiment_log_id = :id"),
+            [{"id": log_id, "kinds": json.dumps(_channel_kinds(data))} for log_id, data in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("experiment_log_output", "channel_kinds")
@@ -0,0 +1,41 @@
+"""experiment_queue_due_indexes
+
+Revision ID: 17_exp_queue_due_indexes
+Revises: 16_exp_log_output_kinds
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "17_exp_queue_due_indexes"
+down_revision: Union[str, Sequence[str], None] = "16_exp_log_output_kinds"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # match the ORDER BY ... LIMIT 1 reads of the submit worker's next wake-up
+    op.create_index(
+        "ix_experiment_queue_status_next_attempt_at",
+        "experiment_queue",
+        ["status", sa.text("next_attempt_at NULLS FIRST")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_experiment_queue_status_lease_until",
+        "experiment_queue",
+        ["status", "lease_until"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_experiment_queue_status_lease_until", table_name="experiment_queue")
+    op.drop_index("ix_experiment_queue_status_next_attempt_at", table_name="experiment_queue")
@@ -1,8 +1,14 @@
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Iterator
 from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 from pydantic import BaseModel
-from sqlalchemy import Column, Enum as SAEnum
+from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, Enum as SAEnum
 from sqlmodel import Field, Relationship, SQLModel
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import TypeDecorator
@@ -33,6 +39,170 @@ class PydanticJSONB(TypeDecorator):
         return to_jsonable(value)
 
 
+# Columnar output_history codec: one typed array per channel, zlib-compressed.
+# Layout: <u32 header length><json header><column buffers, little-endian>.
+_OUTPUT_TYPECODES = {"i8": "q", "f8": "d"}
+_MISSING = object()
+
+
+def _numeric_kind(values: list[Any]) -> str | None:
+    kind = "i8"
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        if isinstance(value, float):
+            kind = "f8"
+        elif not -2**63 <= value < 2**63:
+            return None
+    if kind == "f8" and any(isinstance(value, int) and float(value) != value for value in values):
+        # an int a float64 cannot hold exactly
+        return None
+    return kind
+
+
+def output_channels(samples: list[dict[str, Any]]) -> list[str]:
+    names: dict[str, None] = {}
+    for sample in samples:
+        names.update(dict.fromkeys(sample))
+    return list(names)
+
+
+def _channel_kind(values: Iterator[Any]) -> str | None:
+    # "i8" / "f8" for numbers (gaps and nulls allowed), "json" for anything
+    # else, None when the channel has no values
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "json"
+        if isinstance(value, float):
+            kind = "f8"
+        elif kind is None:
+            kind = "i8"
+    return kind
+
+
+def output_channel_kinds(samples: list[dict[str, Any]]) -> dict[str, str | None]:
+    return {name: _channel_kind(sample.get(name) for sample in samples) for name in output_channels(samples)}
+
+
+def encode_output_history(samples: list[dict[str, Any]]) -> bytes:
+    columns: list[dict[str, Any]] = []
+    buffers: list[bytes] = []
+    for name in output_channels(samples):
+        values = [sample.get(name, _MISSING) for sample in samples]
+        kind = _numeric_kind(values)
+        if kind is None:
+            columns.append({
+                "name": name,
+                "type": "json",
+                "values": [None if value is _MISSING else value for value in values],
+                "missing": [index for index, value in enumerate(values) if value is _MISSING],
+            })
+            continue
+
+        column = array(_OUTPUT_TYPECODES[kind], values)
+        if sys.byteorder != "little":
+            column.byteswap()
+        buffers.append(column.tobytes())
+        spec: dict[str, Any] = {"name": name, "type": kind}
+        ints = [index for index, value in enumerate(values) if kind == "f8" and isinstance(value, int)]
+        if ints:
+            # ints sharing a channel with floats come back as ints
+            spec["ints"] = ints
+        columns.append(spec)
+
+    header = json.dumps({"version": 1, "length": len(samples), "columns": columns}, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(struct.pack("<I", len(header)) + header + b"".join(buffers))
+
+
+class OutputColumns:
+    def __init__(
+        self,
+        length: int,
+        columns: dict[str, Any],
+        missing: dict[str, set[int]],
+        kinds: dict[str, str] | None = None,
+        ints: dict[str, set[int]] | None = None,
+    ) -> None:
+        self.length = length
+        # typed channels are arrays, json channels are lists
+        self.columns = columns
+        self.missing = missing
+        self.kinds = kinds or {}
+        self.ints = ints or {}
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.columns)
+
+    def value(self, name: str, index: int) -> Any:
+        value = self.columns[name][index]
+        return int(value) if index in self.ints.get(name, ()) else value
+
+    def sample(self, index: int) -> dict[str, Any]:
+        return {
+            name: self.value(name, index)
+            for name in self.columns
+            if index not in self.missing.get(name, ())
+        }
+
+    def iter_samples(self) -> Iterator[dict[str, Any]]:
+        for index in range(self.length):
+            yield self.sample(index)
+
+    def to_samples(self) -> list[dict[str, Any]]:
+        return list(self.iter_samples())
+
+    @classmethod
+    def from_samples(cls, samples: list[dict[str, Any]]) -> "OutputColumns":
+        return decode_output_columns(encode_output_history(samples))
+
+
+def decode_output_columns(data: bytes) -> OutputColumns:
+    raw = memoryview(zlib.decompress(data))
+    (header_length,) = struct.unpack_from("<I", raw)
+    header = json.loads(bytes(raw[4:4 + header_length]))
+    length = header["length"]
+    offset = 4 + header_length
+
+    columns: dict[str, Any] = {}
+    missing: dict[str, set[int]] = {}
+    kinds: dict[str, str] = {}
+    ints: dict[str, set[int]] = {}
+    for spec in header["columns"]:
+        kinds[spec["name"]] = spec["type"]
+        if spec.get("ints"):
+            ints[spec["name"]] = set(spec["ints"])
+        if spec["type"] == "json":
+            columns[spec["name"]] = spec["values"]
+            if spec["missing"]:
+                missing[spec["name"]] = set(spec["missing"])
+            continue
+
+        column = array(_OUTPUT_TYPECODES[spec["type"]])
+        size = length * column.itemsize
+        column.frombytes(raw[offset:offset + size])
+        if sys.byteorder != "little":
+            column.byteswap()
+        offset += size
+        columns[spec["name"]] = column
+
+    return OutputColumns(length, columns, missing, kinds, ints)
+
+
+def decode_output_history(data: bytes) -> list[dict[str, Any]]:
+    return decode_output_columns(data).to_samples()
+
+
+def _numeric_time(sample: dict[str, Any]) -> float | None:
+    value = sample.get("time")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
 class ExperimentInputHistoryItem(BaseModel):
     command: Command
     input_args: dict[str, Any]
@@ -91,6 +261,63 @@ class ExperimentLog(ExperimentLogBase, table=True):
     server_id: int = Field(foreign_key="server.id")
     server: "Server" = Relationship(back_populates="experiment_logs")
 
+    output: "ExperimentLogOutput" = Relationship(
+        back_populates="experiment_log",
+        sa_relationship_kwargs={"uselist": False, "cascade": "all, delete-orphan"},
+    )
+
+    def store_run(self, run: ExperimentRun | dict | list | None) -> None:
+        payload = run.model_dump(mode="json") if isinstance(run, BaseModel) else run
+        samples = payload.get("output_history") if isinstance(payload, dict) else None
+        if not isinstance(samples, list) or not all(isinstance(sample, dict) for sample in samples):
+            # legacy / unexpected shapes are kept verbatim in the JSONB column
+            self.run = payload
+            self.output = None
+            return
+
+        self.run = {**payload, "output_history": []}
+        if self.output is None:
+            self.output = ExperimentLogOutput()
+        self.output.fill(samples)
+
+    def load_run(self) -> dict | None:
+        run = self.run.model_dump(mode="json") if isinstance(self.run, BaseModel) else self.run
+        if not isinstance(run, dict) or self.output is None:
+            return run
+        return {**run, "output_history": decode_output_history(self.output.data)}
+
+
+class ExperimentLogOutput(SQLModel, table=True):
+    __tablename__ = "experiment_log_output" # type: ignore
+
+    experiment_log_id: int | None = Field(
+        default=None,
+        sa_column=Column(Integer, ForeignKey("experiment_log.id", ondelete="CASCADE"), primary_key=True),
+    )
+    sample_count: int = Field(default=0)
+    time_start: float | None = Field(default=None)
+    time_end: float | None = Field(default=None)
+    channels: list[str] = Field(default_factory=list, sa_column=Column(JSONB, nullable=False))
+    # value kind per channel, lets exports build a schema without the data
+    channel_kinds: dict[str, str | None] = Field(
+        default_factory=dict,
+        sa_column=Column(JSONB, nullable=False, server_default="{}"),
+    )
+    data: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
+
+    experiment_log: ExperimentLog = Relationship(back_populates="output")
+
+    def fill(self, samples: list[dict[str, Any]]) -> None:
+        self.sample_count = len(samples)
+        self.time_start = _numeric_time(samples[0]) if samples else None
+        self.time_end = _numeric_time(samples[-1]) if samples else None
+        self.channels = output_channels(samples)
+        self.channel_kinds = output_channel_kinds(samples)
+        self.data = encode_output_history(samples)
+
+    def columns(self) -> OutputColumns:
+        return decode_output_columns(self.data)
+
 
 class ExperimentLogPublic(ExperimentLogBase):
     id: int
@@ -112,5 +339,53 @@ class ExperimentLogPublicEnriched(ExperimentLogPublic):
     username: str | None = None
 
 
+class ExperimentRunSeries(BaseModel):
+    x: list[float]
+    y: list[float]
+
+
+class ExperimentRunDownsampled(BaseModel):
+    sample_count: int
+    width: int
+    x_key: str | None
+    series: dict[str, ExperimentRunSeries]
+    # requested or stored channels with no numeric values to plot
+    skipped: list[str] = []
+
+
+class ExperimentRunSummary(BaseModel):
+    sample_count: int = 0
+    duration: float | None = None
+    output_keys: list[str] = []
+
+
+class ExperimentLogSummary(SQLModel):
+    id: int
+    user_id: int
+    device_id: int
+    server_id: int
+    experiment_id: int
+    started_at: datetime | None
+    finished_at: datetime | None
+    finish_reason: FinishReason
+    modified_at: datetime
+    deleted_at: datetime | None
+    server_name: str | None = None
+    device_name: str | None = None
+    software_name: str | None = None
+    username: str | None = None
+    run_summary: ExperimentRunSummary | None = None
+
+
 class ExperimentLogLatestDevice(BaseModel):
-    device_id: int | None
\ No newline at end of file
+    device_id: int | None
+
+
+class ExperimentLogFilter(BaseModel):
+    user_id: int | None = None
+    device_id: int | None = None
+    server_id: int | None = None
+    experiment_id: int | None = None
+    finish_reason: FinishReason | None = None
+    started_from: datetime | None = None
+    started_to: datetime | None = None
\ No newline at end of file
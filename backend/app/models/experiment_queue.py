@@ -31,6 +31,13 @@ class ExperimentQueue(SQLModel, table=True):
     job_id: str | None = Field(default=None)
     attempts: int = Field(default=0)
     next_attempt_at: datetime | None = Field(default=None)
+    poll_attempts: int = Field(default=0)
+    next_poll_at: datetime | None = Field(default=None)
+    # polling gives up after this, see workers.queue.helpers.poll_deadline
+    poll_deadline_at: datetime | None = Field(default=None)
+    # worker lease, see workers.queue.helpers.claim_entries
+    claimed_by: str | None = Field(default=None)
+    lease_until: datetime | None = Field(default=None)
     payload: ExperimentQueuePayload = Field(sa_column=Column(PydanticJSONB, nullable=False))
     status: QueueStatus = Field(
         default=QueueStatus.NOT_STARTED,
@@ -0,0 +1,104 @@
+"""Microbenchmark for the live stream ring buffer.
+
+Run from backend/:  python scripts/bench_stream_buffer.py [--samples 200000]
+
+Reports append throughput for one ring and for 1, 10 and 100 concurrent
+streams through the per-reservation buffer registry, snapshot/read cost, and
+the worst stall an on-loop append sees while the /stream-buffer read runs in
+a thread.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.api.ws.stream_buffer import _StreamRing, _append_stream_sample, _drop_stream_buffer  # noqa: E402
+
+
+def _sample(index: int) -> dict:
+    sample = {"time": index * 0.01, "y1": random.random(), "y2": random.random(), "u": index % 7}
+    if index % 50 == 0:
+        sample["status"] = "ok"
+    return sample
+
+
+def _fill(ring: _StreamRing, count: int) -> float:
+    started = time.perf_counter()
+    for index in range(count):
+        ring.append(_sample(index))
+    return time.perf_counter() - started
+
+
+async def _stream(reservation_id: int, samples: list[dict], count: int) -> None:
+    # one upstream session: appends interleaved with the other streams on the loop
+    for index in range(count):
+        _append_stream_sample(reservation_id, samples[index % len(samples)])
+        if index % 64 == 63:
+            await asyncio.sleep(0)
+
+
+async def _concurrent_streams(streams: int, count: int) -> float:
+    samples = [_sample(index) for index in range(1024)]
+    reservation_ids = range(1, streams + 1)
+    started = time.perf_counter()
+    await asyncio.gather(*[_stream(reservation_id, samples, count) for reservation_id in reservation_ids])
+    elapsed = time.perf_counter() - started
+    for reservation_id in reservation_ids:
+        _drop_stream_buffer(reservation_id)
+    return elapsed
+
+
+async def _append_stalls(ring: _StreamRing, reads: int, rate_hz: float) -> list[float]:
+    # appends at the device rate on the loop while reads run in the threadpool
+    stalls: list[float] = []
+    reader = asyncio.gather(*[asyncio.to_thread(ring.read, 0) for _ in range(reads)])
+    index = ring.next_seq
+    while not reader.done():
+        started = time.perf_counter()
+        ring.append(_sample(index))
+        stalls.append(time.perf_counter() - started)
+        index += 1
+        await asyncio.sleep(1 / rate_hz)
+    await reader
+    return stalls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=200_000)
+    parser.add_argument("--reads", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--stream-samples", type=int, default=20_000)
+    args = parser.parse_args()
+
+    for streams in (1, 10, 100):
+        elapsed = asyncio.run(_concurrent_streams(streams, args.stream_samples))
+        total = streams * args.stream_samples
+        print(f"append x{streams} streams: {total} samples in {elapsed:.3f}s ({total / elapsed:,.0f}/s)")
+
+    ring = _StreamRing(args.samples)
+    elapsed = _fill(ring, args.samples)
+    print(f"append: {args.samples} samples in {elapsed:.3f}s ({args.samples / elapsed:,.0f}/s)")
+
+    started = time.perf_counter()
+    snapshot = ring.snapshot(0)
+    print(f"snapshot (lock held): {(time.perf_counter() - started) * 1000:.1f} ms for {len(snapshot)} samples")
+
+    started = time.perf_counter()
+    snapshot.samples()
+    print(f"build dicts (no lock): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    stalls = asyncio.run(_append_stalls(ring, args.reads, args.rate))
+    print(
+        f"append during {args.reads} concurrent reads: n={len(stalls)} "
+        f"median={statistics.median(stalls) * 1e6:.0f} us max={max(stalls) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Event-loop latency check for the reservation websocket DB calls.
+
+Run from backend/:  python scripts/bench_ws_db_latency.py [--sessions 16] [--database]
+
+Simulates concurrent sessions each making blocking DB calls, once inline on
+the loop (the old behaviour) and once through app.api.ws.db.run_db, while a
+ticker measures how late the loop wakes up. With --database the blocking call
+is a real `SELECT pg_sleep(...)` on the app engine instead of time.sleep.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.api.ws.db import run_db, shutdown_db_executor  # noqa: E402
+
+
+TICK_SECONDS = 0.005
+
+
+def _sleep_call(seconds: float) -> Callable[[], None]:
+    return lambda: time.sleep(seconds)
+
+
+def _database_call(seconds: float) -> Callable[[], None]:
+    from sqlalchemy import text
+    from sqlmodel import Session
+
+    from app.api.dependencies import engine
+
+    def call() -> None:
+        with Session(engine) as session:
+            session.exec(text("SELECT pg_sleep(:seconds)"), params={"seconds": seconds})  # type: ignore[call-overload]
+
+    return call
+
+
+async def _ticker(stop: asyncio.Event, lags: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def _session(call: Callable[[], None], calls: int, offload: bool) -> None:
+    for _ in range(calls):
+        if offload:
+            await run_db(call)
+        else:
+            call()
+        await asyncio.sleep(0)
+
+
+async def _measure(call: Callable[[], None], sessions: int, calls: int, offload: bool) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    lags: list[float] = []
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    await asyncio.sleep(TICK_SECONDS * 2)
+    started = time.perf_counter()
+    await asyncio.gather(*[_session(call, calls, offload) for _ in range(sessions)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return elapsed, lags
+
+
+def _report(label: str, elapsed: float, lags: list[float]) -> None:
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"{label:>8}: wall={elapsed:.2f}s ticks={len(lags)} "
+        f"median_lag={statistics.median(lags) * 1000:.1f}ms p99={p99 * 1000:.1f}ms max={lags[-1] * 1000:.1f}ms"
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    call = _database_call(args.call_ms / 1000) if args.database else _sleep_call(args.call_ms / 1000)
+    for label, offload in (("inline", False), ("run_db", True)):
+        elapsed, lags = await _measure(call, args.sessions, args.calls, offload)
+        _report(label, elapsed, lags)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--call-ms", type=float, default=50.0)
+    parser.add_argument("--database", action="store_true")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args))
+    finally:
+        shutdown_db_executor()
+
+
+if __name__ == "__main__":
+    main()
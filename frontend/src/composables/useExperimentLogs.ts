@@ -1,26 +1,41 @@
-import type { ExperimentLog } from '@/types/api';
-import { ref } from 'vue';
+import type { ExperimentLog, ExperimentRun } from '@/types/api';
+import { computed, ref } from 'vue';
 import { apiClient } from '../lib/apiClient';
 import { useI18n } from 'vue-i18n';
 
+const PAGE_SIZE = 100;
+
 export function useExperimentLogs() {
     const experimentLogs = ref<ExperimentLog[]>([]);
     const userExperimentLogs = ref<ExperimentLog[]>([]);
     const loading = ref(false);
+    const loadingMore = ref(false);
+    // cursor of the next /experiment_log/ page, null once the last page is loaded
+    const nextCursor = ref<string | null>(null);
+    const hasMoreExperimentLogs = computed(() => nextCursor.value !== null);
     const error = ref<string | null>(null);
     const { t } = useI18n();
 
+    async function fetchExperimentLogPage(cursor?: string): Promise<ExperimentLog[]> {
+        const response = await apiClient.get('/experiment_log/', {
+            params: { limit: PAGE_SIZE, cursor },
+        });
+        nextCursor.value = response.headers['x-next-cursor'] || null;
+        return response.data;
+    }
+
     async function fetchExperimentLogs(): Promise<{ success: boolean; message?: string }> {
         loading.value = true;
         error.value = null;
 
         try {
-            const response = await apiClient.get('/experiment_log/');
-            experimentLogs.value = response.data;
+            // first page only; further pages come from loadMoreExperimentLogs
+            experimentLogs.value = await fetchExperimentLogPage();
             return { success: true };
         } catch (e: any) {
             console.error('Error fetching experimentLogs:', e);
             experimentLogs.value = [];
+            nextCursor.value = null;
             error.value = t('error.fetch');
             return { success: false, message: error.value };
         } finally {
@@ -28,6 +43,23 @@ export function useExperimentLogs() {
         }
     }
 
+    async function loadMoreExperimentLogs(): Promise<{ success: boolean; message?: string }> {
+        if (nextCursor.value === null || loadingMore.value) return { success: true };
+        loadingMore.value = true;
+
+        try {
+            const page = await fetchExperimentLogPage(nextCursor.value);
+            experimentLogs.value = [...experimentLogs.value, ...page];
+            return { success: true };
+        } catch (e: any) {
+            // keep the cursor so the next attempt retries the same page
+            console.error('Error fetching more experimentLogs:', e);
+            return { success: false, message: t('error.fetch') };
+        } finally {
+            loadingMore.value = false;
+        }
+    }
+
     async function fetchExperimentLogsByUser(): Promise<{ success: boolean; message?: string }> {
         error.value = null;
         loading.value = true;
@@ -54,6 +86,16 @@ export function useExperimentLogs() {
         }
     }
 
+    async function fetchExperimentLogRun(id: number): Promise<ExperimentRun | null> {
+        try {
+            const response = await apiClient.get(`/experiment_log/${id}/run`);
+            return response.data ?? null;
+        } catch (e: any) {
+            console.error('Error fetching experiment log run:', e);
+            return null;
+        }
+    }
+
     async function deleteExperimentLog(id: number): Promise<{ success: boolean; message?: string }> {
         try {
             await apiClient.delete(`/experiment_log/${id}`);
@@ -76,10 +118,14 @@ export function useExperimentLogs() {
         experimentLogs,
         userExperimentLogs,
         loading,
+        loadingMore,
         error,
+        hasMoreExperimentLogs,
         fetchExperimentLogs,
+        loadMoreExperimentLogs,
         fetchExperimentLogsByUser,
         fetchLastUsedDeviceId,
+        fetchExperimentLogRun,
         deleteExperimentLog,
         restoreExperimentLog,
     };
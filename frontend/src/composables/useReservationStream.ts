@@ -94,6 +94,11 @@ export function useReservationStream() {
             const fallback = nextIndex.value + rows.length;
             nextIndex.value = Math.max(0, Math.floor(serverNextIndex ?? fallback));
         },
+        onLiveSamplesReceived: (rows, serverNextIndex) => {
+            // same start-acceptance handling as single live samples, then the exact cursor
+            rows.forEach((row) => handleIncomingPayload(row));
+            nextIndex.value = Math.max(0, Math.floor(serverNextIndex));
+        },
         onReservationExpired: (reason) => markReservationInactive(reason),
         onUpstreamUnavailable: (reason) => markUpstreamUnavailable(reason),
         onWarning: (msg) => { warningMessage.value = msg; },
@@ -153,7 +158,6 @@ export function useReservationStream() {
         accessToken.value = token;
         clearGraph();
         transport.connect(token);
-        void transport.pullStreamBuffer();
     };
 
     const deactivate = () => {
@@ -189,7 +193,6 @@ export function useReservationStream() {
             return { success: true };
         }
         transport.connect(accessToken.value);
-        transport.startPolling();
         return { success: true };
     };
 
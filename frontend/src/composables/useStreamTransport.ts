@@ -8,6 +8,8 @@ interface StreamBufferResponse {
     reservation_id: number | null;
     samples: unknown[];
     next_index: number;
+    first_index?: number;
+    dropped?: number;
     total: number;
 }
 
@@ -15,6 +17,7 @@ export interface StreamTransportCallbacks {
     onMessage: (payload: OutputRow) => void;
     onConnected: () => void;
     onSamplesReceived: (rows: OutputRow[], serverNextIndex: number | null) => void;
+    onLiveSamplesReceived: (rows: OutputRow[], serverNextIndex: number) => void;
     onReservationExpired: (reason: string) => void;
     onUpstreamUnavailable: (reason: string) => void;
     onWarning: (message: string) => void;
@@ -23,6 +26,7 @@ export interface StreamTransportCallbacks {
 
 const POLL_INTERVAL_MS = 750;
 const RECONNECT_DELAY_MS = 1000;
+const WS_TRY_AGAIN_LATER = 1013;
 
 export const isRecord = (value: unknown): value is OutputRow =>
     typeof value === 'object' && value !== null && !Array.isArray(value);
@@ -53,12 +57,33 @@ const isUpstreamUnavailableReason = (reason: string): boolean => {
     return r.includes('server unavailable') || r.includes('device server');
 };
 
-function buildWebSocketUrl(token: string): string {
+interface StreamReplayFrame {
+    samples: unknown[];
+    next_index: number;
+    dropped?: number;
+    done: boolean;
+}
+
+const isReplayFrame = (value: unknown): value is StreamReplayFrame =>
+    isRecord(value) && Array.isArray(value.samples) && typeof value.next_index === 'number';
+
+// live samples the server merged (or sent after dropping some) for a slow client
+interface StreamLiveFrame {
+    samples: unknown[];
+    next_index: number;
+    dropped?: number;
+}
+
+const isLiveFrame = (value: unknown): value is StreamLiveFrame =>
+    isRecord(value) && Array.isArray(value.samples) && typeof value.next_index === 'number';
+
+function buildWebSocketUrl(token: string, resumeFrom: number): string {
     const apiBaseUrl = import.meta.env.VITE_API_BASE_URL || window.location.origin;
     const resolved = new URL(apiBaseUrl, window.location.origin);
     const wsProtocol = resolved.protocol === 'https:' ? 'wss:' : 'ws:';
     const url = new URL('/ws/reservation/current', `${wsProtocol}//${resolved.host}`);
     url.searchParams.set('access_token', token);
+    url.searchParams.set('resume_from', String(Math.max(0, Math.floor(resumeFrom))));
     return url.toString();
 }
 
@@ -98,7 +123,6 @@ export function useStreamTransport(
             reconnectTimer = null;
             if (!isActive.value || !accessToken.value) return;
             connect(accessToken.value);
-            void pullStreamBuffer();
         }, RECONNECT_DELAY_MS);
     };
 
@@ -149,6 +173,11 @@ export function useStreamTransport(
                 return;
             }
 
+            const dropped = response.data.dropped ?? 0;
+            if (dropped > 0) {
+                callbacks.onWarning(`Stream buffer overflow: ${dropped} samples were evicted before they could be fetched.`);
+            }
+
             const rawNext = response.data.next_index;
             if (!Number.isFinite(rawNext)) {
                 callbacks.onWarning('Stream index fallback: server returned invalid next_index.');
@@ -172,7 +201,8 @@ export function useStreamTransport(
             return;
         }
 
-        const ws = new WebSocket(buildWebSocketUrl(token));
+        // the server replays everything buffered after nextIndex before going live
+        const ws = new WebSocket(buildWebSocketUrl(token, nextIndex.value));
         websocketRef.value = ws;
 
         ws.onopen = () => {
@@ -181,13 +211,28 @@ export function useStreamTransport(
             callbacks.onStatus('WebSocket connected.');
             clearPolling();
             clearReconnectTimer();
-            void pullStreamBuffer();
             callbacks.onConnected();
         };
 
         ws.onmessage = (event) => {
             const raw = String(event.data ?? '');
             const payload = parseMessagePayload(raw);
+            if (payload && isReplayFrame(payload.replay)) {
+                const frame = payload.replay;
+                if ((frame.dropped ?? 0) > 0) {
+                    callbacks.onWarning(`Stream buffer overflow: ${frame.dropped} samples were evicted before they could be fetched.`);
+                }
+                callbacks.onSamplesReceived(frame.samples.filter((s): s is OutputRow => isRecord(s)), frame.next_index);
+                return;
+            }
+            if (payload && isLiveFrame(payload.live)) {
+                const frame = payload.live;
+                if ((frame.dropped ?? 0) > 0) {
+                    callbacks.onWarning(`Connection too slow: ${frame.dropped} live samples were dropped.`);
+                }
+                callbacks.onLiveSamplesReceived(frame.samples.filter((s): s is OutputRow => isRecord(s)), frame.next_index);
+                return;
+            }
             if (payload) {
                 callbacks.onMessage(payload);
                 return;
@@ -196,7 +241,7 @@ export function useStreamTransport(
         };
 
         ws.onerror = () => {
-            callbacks.onWarning('WebSocket error. Using pull sync until reconnect.');
+            callbacks.onWarning('WebSocket error. Reconnecting.');
         };
 
         ws.onclose = (event) => {
@@ -219,8 +264,14 @@ export function useStreamTransport(
 
             if (!isActive.value) return;
 
-            callbacks.onStatus('WebSocket offline. Polling stream buffer.');
-            startPolling();
+            if (event.code === WS_TRY_AGAIN_LATER) {
+                // the session is still finishing a run on another backend worker
+                callbacks.onStatus('Session busy on another worker. Retrying.');
+                scheduleReconnect();
+                return;
+            }
+
+            callbacks.onStatus('WebSocket offline. Reconnecting.');
             scheduleReconnect();
         };
     };
@@ -196,6 +196,7 @@ export default {
         finishReason: 'Finish reason',
         unit: 'Unit',
         logPrefix: 'Log',
+        loadMore: 'Load more',
         itemsPerPage: 'Items per page',
         filterActive: 'Active',
         filterDeleted: 'Deleted',
@@ -196,6 +196,7 @@ export default {
         finishReason: 'Dôvod ukončenia',
         unit: 'Jednotka',
         logPrefix: 'Záznam',
+        loadMore: 'Načítať ďalšie',
         itemsPerPage: 'Položiek na stránku',
         filterActive: 'Aktívne',
         filterDeleted: 'Vymazané',
@@ -88,13 +88,25 @@ export interface ExperimentLog {
     device_name?: string;
     software_name?: string;
     username?: string;
-    run: { input_history: ExperimentHistoryItem[]; output_history: Record<string, unknown>[] } | null;
+    run?: ExperimentRun | null;
+    run_summary?: ExperimentRunSummary | null;
     started_at: string | null;
     finished_at: string | null;
     finish_reason: FinishReason;
     deleted_at?: string | null;
 }
 
+export interface ExperimentRun {
+    input_history: ExperimentHistoryItem[];
+    output_history: Record<string, unknown>[];
+}
+
+export interface ExperimentRunSummary {
+    sample_count: number;
+    duration: number | null;
+    output_keys: string[];
+}
+
 export type FinishReason = 'n/a' | 'user_stop' | 'simulation_time_reached' | 'device_timeout' | 'exception_error';
 
 export interface ExperimentHistoryItem {
@@ -42,7 +42,17 @@ export const extractTimeSeries = (log: ExperimentLog): number[] => {
         .filter((value): value is number => value !== null);
 };
 
+const summaryInterval = (log: ExperimentLog): number | null => {
+    const summary = log.run_summary;
+    if (!summary || summary.duration === null || summary.sample_count < 2) return null;
+    return summary.duration / (summary.sample_count - 1);
+};
+
 export const estimateSimulationTime = (log: ExperimentLog): number | null => {
+    if (!log.run && log.run_summary?.duration != null) {
+        const duration = log.run_summary.duration + (summaryInterval(log) ?? 0);
+        return Number(duration.toFixed(3));
+    }
     const times = extractTimeSeries(log);
     if (times.length === 0) return null;
     const minTime = Math.min(...times);
@@ -53,6 +63,10 @@ export const estimateSimulationTime = (log: ExperimentLog): number | null => {
 };
 
 export const estimateSampleInterval = (log: ExperimentLog): number | null => {
+    if (!log.run && log.run_summary) {
+        const interval = summaryInterval(log);
+        return interval !== null ? Number(interval.toFixed(3)) : null;
+    }
     const times = extractTimeSeries(log);
     if (times.length < 2) return null;
     const deltas: number[] = [];